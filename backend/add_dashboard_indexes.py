@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the dashboard query indexes to existing tables.
+
+db.create_all() only creates indexes for new tables, so databases created before
+the indexes were declared on Transaction, Loan and User need this script once.
+Indexes that were replaced by wider ones are dropped.
+"""
+
+import sys
+import os
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.database import db
+from models.transaction import Transaction
+from models.loan import Loan
+from models.user import User
+from app import create_app
+
+# Earlier index names that the declared indexes now cover
+SUPERSEDED_INDEXES = {
+    'mg_transactions': ('ix_tx_created_at', 'ix_tx_status', 'ix_tx_method', 'ix_mg_transactions_loan_id'),
+}
+
+def add_dashboard_indexes():
+    """Create any declared Transaction/Loan/User indexes that are missing and drop superseded ones."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            inspector = db.inspect(db.engine)
+
+            for model in (Transaction, Loan, User):
+                table = model.__table__
+                existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+
+                for index in table.indexes:
+                    if index.name in existing:
+                        print(f"✅ {table.name}.{index.name} already exists")
+                        continue
+                    print(f"Creating {table.name}.{index.name}...")
+                    index.create(db.engine)
+                    print(f"✅ Created {index.name}")
+
+                for name in SUPERSEDED_INDEXES.get(table.name, ()):
+                    if name not in existing:
+                        continue
+                    print(f"Dropping superseded {table.name}.{name}...")
+                    if db.engine.dialect.name == 'mssql':
+                        statement = f"DROP INDEX {name} ON {table.name}"
+                    else:
+                        statement = f"DROP INDEX {name}"
+                    with db.engine.begin() as conn:
+                        conn.execute(db.text(statement))
+                    print(f"✅ Dropped {name}")
+
+            print("\n🎉 Migration completed successfully!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            raise
+
+if __name__ == '__main__':
+    print("Starting dashboard index migration...")
+    add_dashboard_indexes()
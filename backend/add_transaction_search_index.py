@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add a trigram search index for transactions.
+
+Indexes reference, phone_number and paynow_reference for the admin transaction
+search (see utils.database.create_trigram_index). On SQL Server, which has no
+trigram index type, the LIKE search scans the narrow ix_tx_search_columns
+index created by add_dashboard_indexes.py instead of the table.
+"""
+
+import sys
+import os
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.database import create_trigram_index
+from models.transaction import SEARCH_INDEX_TABLE
+from app import create_app
+
+SEARCH_COLUMNS = ['reference', 'phone_number', 'paynow_reference']
+
+def add_transaction_search_index():
+    """Create and populate the FTS5 trigram index on SQLite."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            if create_trigram_index(SEARCH_INDEX_TABLE, 'mg_transactions', SEARCH_COLUMNS):
+                print("\n🎉 Migration completed successfully!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            raise
+
+if __name__ == '__main__':
+    print("Starting transaction search index migration...")
+    add_transaction_search_index()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add a trigram search index for users.
+
+Indexes full_name, username, email and phone_number for the admin customer and
+user list search (see utils.database.create_trigram_index). SQL Server
+full-text indexes only match words and word prefixes, not arbitrary
+substrings, so there the search stays on LIKE.
+"""
+
+import sys
+import os
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.database import create_trigram_index
+from models.user import SEARCH_INDEX_TABLE
+from app import create_app
+
+SEARCH_COLUMNS = ['full_name', 'username', 'email', 'phone_number']
+
+def add_user_search_index():
+    """Create and populate the FTS5 trigram index on SQLite."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            if create_trigram_index(SEARCH_INDEX_TABLE, 'mg_users', SEARCH_COLUMNS):
+                print("\n🎉 Migration completed successfully!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            raise
+
+if __name__ == '__main__':
+    print("Starting user search index migration...")
+    add_user_search_index()
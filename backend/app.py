@@ -6,7 +6,8 @@ from flasgger import Swagger
 
 from config import get_config
 from utils.database import init_db
-from services import PaynowService, PaymentService
+from utils.responses import init_json
+from services import PaynowService, PaymentService, login_attempt_recorder, payment_dispatcher
 from routes import blueprints
 from routes.auth import auth_bp
 from routes.payment import init_payment_routes
@@ -40,6 +41,7 @@ def create_app(config_name=None):
     app.config.from_object(config_class)
     
     # Initialize extensions
+    init_json(app)
     CORS(app, supports_credentials=True)  # Enable CORS for React Native app
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
@@ -56,6 +58,7 @@ def create_app(config_name=None):
     
     # Initialize database
     init_db(app)
+    login_attempt_recorder.init_app(app)
     
     # Initialize services
     paynow_service = PaynowService(
@@ -66,6 +69,7 @@ def create_app(config_name=None):
     )
     
     payment_service = PaymentService(paynow_service)
+    payment_dispatcher.init_app(app, payment_service)
     
     # Initialize routes with service dependencies
     init_payment_routes(payment_service)
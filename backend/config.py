@@ -41,9 +41,12 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 20,  # room for the dashboard overview's parallel queries
         'pool_timeout': 30,
         'pool_recycle': 3600,
         'pool_pre_ping': True,
+        'query_cache_size': 1200,  # compiled SQL cache (default 500)
         'echo': False
     }
     
@@ -53,6 +56,9 @@ class Config:
     RETURN_URL = os.getenv('RETURN_URL', 'http://localhost:3000/payment/return')
     RESULT_URL = os.getenv('RESULT_URL', 'http://localhost:5000/paynow/result')
     
+    # Redis (optional) - shared rate limiting across workers
+    REDIS_URL = os.getenv('REDIS_URL')
+    
     # API settings
     API_TITLE = 'Loan Repayment API'
     API_VERSION = 'v1.0'
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Database migration script to drop the redundant user_type column from mg_users.
+
+user_type always mirrored role; User.user_type is now a read-only alias.
+
+Deploy order: run this script BEFORE starting the application version that
+no longer maps user_type. On existing databases the column is NOT NULL with
+no server-side default, so once the model stops writing it every User
+insert fails until the column has been dropped. Stop the app, run this
+script, then start the new version.
+"""
+
+import sys
+import os
+from sqlalchemy import text
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.database import db
+from app import create_app
+
+def drop_user_type_column():
+    """Copy any missing role values from user_type, then drop the column."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            inspector = db.inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('mg_users')]
+
+            if 'user_type' not in columns:
+                print("✅ 'user_type' column already dropped")
+                return
+
+            dialect = db.engine.dialect.name
+            print(f"Database type: {dialect}")
+
+            with db.engine.begin() as conn:
+                # Last-resort copy so no user loses their role
+                result = conn.execute(text("""
+                    UPDATE mg_users SET role = user_type
+                    WHERE (role IS NULL OR role = '') AND user_type IS NOT NULL
+                """))
+                print(f"✅ Backfilled role for {result.rowcount} users")
+
+                if dialect == 'mssql':
+                    # SQL Server refuses to drop a column that still has a DEFAULT constraint
+                    constraint = conn.execute(text("""
+                        SELECT dc.name FROM sys.default_constraints dc
+                        JOIN sys.columns c
+                          ON c.object_id = dc.parent_object_id AND c.column_id = dc.parent_column_id
+                        WHERE dc.parent_object_id = OBJECT_ID('mg_users') AND c.name = 'user_type'
+                    """)).scalar()
+                    if constraint:
+                        conn.execute(text(f"ALTER TABLE mg_users DROP CONSTRAINT [{constraint}]"))
+                        print(f"✅ Dropped default constraint {constraint}")
+
+                print("Dropping 'user_type' column...")
+                conn.execute(text("ALTER TABLE mg_users DROP COLUMN user_type"))
+                print("✅ Dropped 'user_type' column")
+
+            print("\n🎉 Migration completed successfully!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            raise
+
+if __name__ == '__main__':
+    print("Starting user_type column migration...")
+    drop_user_type_column()
@@ -42,7 +42,6 @@ def initialize_database():
                     email='admin@example.com', 
                     full_name='System Administrator',
                     role='admin',
-                    user_type='admin',
                     is_active=True
                 )
                 admin.set_password('admin123')
@@ -63,7 +62,6 @@ def initialize_database():
                         full_name='John Doe',
                         phone_number='0771234567',
                         role='customer',
-                        user_type='customer',
                         is_active=True
                     ),
                     User(
@@ -72,7 +70,6 @@ def initialize_database():
                         full_name='Jane Smith',
                         phone_number='0779876543',
                         role='customer',
-                        user_type='customer',
                         is_active=True
                     ),
                     User(
@@ -81,7 +78,6 @@ def initialize_database():
                         full_name='Mike Wilson',
                         phone_number='0775555555',
                         role='customer',
-                        user_type='customer',
                         is_active=True
                     )
                 ]
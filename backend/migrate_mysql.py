@@ -40,7 +40,6 @@ def migrate_mysql_schema():
                         'full_name': 'VARCHAR(100)',
                         'phone_number': 'VARCHAR(15)',
                         'role': 'VARCHAR(20) DEFAULT "admin"',
-                        'user_type': 'VARCHAR(20) DEFAULT "admin"',
                         'is_active': 'BOOLEAN DEFAULT 1',
                         'last_login': 'DATETIME',
                         'failed_login_attempts': 'INT DEFAULT 0',
@@ -63,7 +62,6 @@ def migrate_mysql_schema():
                     print("🔄 Updating existing users with default values...")
                     update_queries = [
                         "UPDATE users SET role = 'admin' WHERE role IS NULL OR role = ''",
-                        "UPDATE users SET user_type = 'admin' WHERE user_type IS NULL OR user_type = ''",
                         "UPDATE users SET is_active = 1 WHERE is_active IS NULL",
                         "UPDATE users SET failed_login_attempts = 0 WHERE failed_login_attempts IS NULL"
                     ]
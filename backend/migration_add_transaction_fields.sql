@@ -10,7 +10,6 @@ CREATE TABLE IF NOT EXISTS mg_users (
     full_name VARCHAR(100),
     phone_number VARCHAR(15),
     role VARCHAR(20) DEFAULT 'admin' NOT NULL,
-    user_type VARCHAR(20) DEFAULT 'admin' NOT NULL,
     is_active BOOLEAN DEFAULT TRUE NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
     last_login DATETIME,
@@ -97,8 +96,8 @@ CREATE TABLE IF NOT EXISTS mg_login_attempts (
 );
 
 -- Insert sample admin user (password: admin123)
-INSERT IGNORE INTO mg_users (username, email, password_hash, full_name, role, user_type) 
-VALUES ('admin', 'admin@loanpay.com', 'scrypt:32768:8:1$8X9Q2vZJzNbXqY3P$7d4e9c8f5a6b3c2d1e0f9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2d1e0f9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1', 'System Administrator', 'admin', 'admin');
+INSERT IGNORE INTO mg_users (username, email, password_hash, full_name, role) 
+VALUES ('admin', 'admin@loanpay.com', 'scrypt:32768:8:1$8X9Q2vZJzNbXqY3P$7d4e9c8f5a6b3c2d1e0f9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2d1e0f9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1', 'System Administrator', 'admin');
 
 -- Verify tables were created
 SELECT 'mg_users' as table_name, COUNT(*) as record_count FROM mg_users
@@ -2,10 +2,30 @@
 from utils.database import db
 from datetime import datetime
 from decimal import Decimal
+from types import SimpleNamespace
 
 class Loan(db.Model):
     """Loan model for tracking customer loans."""
     __tablename__ = 'mg_loans'
+    __table_args__ = (
+        # Customer loan listings are ordered newest first
+        db.Index('ix_loan_user_created', 'user_id', 'created_at'),
+        # Admin "recent loans": newest first across all customers. On SQL Server
+        # the serialized columns are included so the top rows come from the index.
+        db.Index('ix_loan_created_at', 'created_at', mssql_include=[
+            'loan_id', 'user_id', 'original_amount', 'outstanding_balance', 'interest_rate',
+            'term_months', 'status', 'disbursement_date', 'updated_at', 'completed_at'
+        ]),
+        # Status-filtered listings ordered newest first and GROUP BY status
+        # summaries; on SQL Server the summed amounts come from the index too.
+        db.Index('ix_loan_status_created', 'status', 'created_at', mssql_include=[
+            'original_amount', 'outstanding_balance'
+        ]),
+        # Per-customer loan rollups split by status
+        db.Index('ix_loan_user_status', 'user_id', 'status', mssql_include=[
+            'original_amount', 'outstanding_balance'
+        ]),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     loan_id = db.Column(db.String(20), unique=True, nullable=False, index=True)
@@ -65,45 +85,97 @@ class Loan(db.Model):
         
         self.updated_at = datetime.utcnow()
     
+    @staticmethod
+    def calc_paid_amount(original_amount, outstanding_balance):
+        """Amount paid so far on a loan."""
+        return original_amount - outstanding_balance
+    
+    @staticmethod
+    def calc_progress_percentage(original_amount, outstanding_balance):
+        """Share of the loan paid so far, as a percentage capped at 100."""
+        if original_amount > 0:
+            paid = Loan.calc_paid_amount(original_amount, outstanding_balance)
+            return min(100, (float(paid) / float(original_amount)) * 100)
+        return 0
+    
+    @staticmethod
+    def calc_monthly_payment(original_amount, term_months):
+        """Expected monthly payment: the principal spread over the term."""
+        if term_months and original_amount:
+            return original_amount / term_months
+        return original_amount
+    
     @property
     def progress_percentage(self):
         """Calculate payment progress."""
-        if self.original_amount > 0:
-            paid = self.original_amount - self.outstanding_balance
-            return min(100, (float(paid) / float(self.original_amount)) * 100)
-        return 0
+        return self.calc_progress_percentage(self.original_amount, self.outstanding_balance)
     
     @property
     def paid_amount(self):
         """Calculate total amount paid."""
-        return self.original_amount - self.outstanding_balance
+        return self.calc_paid_amount(self.original_amount, self.outstanding_balance)
     
     @property
     def monthly_payment(self):
         """Calculate expected monthly payment."""
-        if self.term_months and self.original_amount:
-            return self.original_amount / self.term_months
-        return self.original_amount
+        return self.calc_monthly_payment(self.original_amount, self.term_months)
     
     def to_dict(self):
+        return self._serialize(
+            self,
+            self.customer.full_name if hasattr(self, 'customer') and self.customer else 'Unknown'
+        )
+    
+    @classmethod
+    def projection_query(cls):
+        """Query the columns serialized by to_dict() without building ORM objects.
+        
+        The customer name is joined in; serialize the rows with ``row_to_dict()``.
+        
+        Returns:
+            Query: Row query that accepts the usual filters and ordering
+        """
+        from models.user import User
+        
+        return db.session.query(
+            *cls.__table__.columns,
+            User.full_name.label('customer_name')
+        ).outerjoin(User, User.id == cls.user_id)
+    
+    @classmethod
+    def row_to_dict(cls, row):
+        """Convert a ``projection_query()`` row to the ``to_dict()`` format."""
+        # Row attribute lookups are name-resolved each time; copy once instead
+        loan = SimpleNamespace(**dict(zip(row._fields, row)))
+        return cls._serialize(loan, loan.customer_name or 'Unknown')
+    
+    @staticmethod
+    def _serialize(loan, customer_name):
+        """Build the loan dictionary from a model instance or row."""
+        original = loan.original_amount
+        outstanding = loan.outstanding_balance
+        paid = Loan.calc_paid_amount(original, outstanding)
+        progress = Loan.calc_progress_percentage(original, outstanding)
+        monthly = Loan.calc_monthly_payment(original, loan.term_months)
+        
         return {
-            'id': self.id,
-            'loan_id': self.loan_id,
-            'user_id': self.user_id,
-            'customer_name': self.customer.full_name if hasattr(self, 'customer') and self.customer else 'Unknown',
-            'original_amount': float(self.original_amount),
-            'outstanding_balance': float(self.outstanding_balance),
-            'paid_amount': float(self.paid_amount),
-            'progress_percentage': round(self.progress_percentage, 1),
-            'interest_rate': float(self.interest_rate),
-            'term_months': self.term_months,
-            'monthly_payment': float(self.monthly_payment),
-            'status': self.status,
-            'is_active': self.status == 'active' and self.outstanding_balance > 0,
-            'disbursement_date': self.disbursement_date.isoformat() if self.disbursement_date else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'id': loan.id,
+            'loan_id': loan.loan_id,
+            'user_id': loan.user_id,
+            'customer_name': customer_name,
+            'original_amount': float(original),
+            'outstanding_balance': float(outstanding),
+            'paid_amount': float(paid),
+            'progress_percentage': round(progress, 1),
+            'interest_rate': float(loan.interest_rate),
+            'term_months': loan.term_months,
+            'monthly_payment': float(monthly),
+            'status': loan.status,
+            'is_active': loan.status == 'active' and outstanding > 0,
+            'disbursement_date': loan.disbursement_date.isoformat() if loan.disbursement_date else None,
+            'created_at': loan.created_at.isoformat(),
+            'updated_at': loan.updated_at.isoformat(),
+            'completed_at': loan.completed_at.isoformat() if loan.completed_at else None
         }
     
     @classmethod
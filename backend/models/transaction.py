@@ -1,20 +1,58 @@
 """Transaction model for storing payment transactions with loan relationships."""
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import random
 import string
-from utils.database import db
+from types import SimpleNamespace
+from sqlalchemy import func, case, select, lambda_stmt, or_
+from utils.database import db, trigram_match
+from utils.cache import invalidate_dashboard_cache
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is used instead
+    orjson = None
+
+# SQLite FTS5 trigram index created by add_transaction_search_index.py
+SEARCH_INDEX_TABLE = 'mg_transactions_search'
+
+def _load_json_column(value):
+    """Decode a stored JSON text column, using orjson when installed."""
+    if not value:
+        return None
+    if orjson is not None:
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN written by json.dumps; stdlib accepts it
+    return json.loads(value)
 
 class Transaction(db.Model):
     """Database model for storing payment transactions."""
     __tablename__ = 'mg_transactions'
+    __table_args__ = (
+        # Dashboard filters, date ranges and per-customer history. status and
+        # amount ride along so the today/weekly aggregates over a created_at
+        # range are answered from the index alone.
+        db.Index('ix_tx_created_status_amount', 'created_at', 'status', 'amount'),
+        db.Index('ix_tx_user_created', 'user_id', 'created_at'),
+        # Per-loan payment history and the grouped per-loan payment summaries
+        db.Index('ix_tx_loan_created', 'loan_id', 'created_at', mssql_include=['status', 'paid_at']),
+        # Status/method filtered listings ordered newest first; the leading
+        # column still serves plain GROUP BY status/method aggregates.
+        db.Index('ix_tx_status_created', 'status', 'created_at'),
+        db.Index('ix_tx_method_created', 'method', 'created_at'),
+        # Narrow copy of the searched columns: substring search scans this
+        # instead of the full rows (see search_filter)
+        db.Index('ix_tx_search_columns', 'reference', 'phone_number', 'paynow_reference'),
+    )
     
     # Primary key
     id = db.Column(db.Integer, primary_key=True)
     
     # Foreign keys for loan relationships
     user_id = db.Column(db.Integer, db.ForeignKey('mg_users.id'), nullable=True, index=True)
-    loan_id = db.Column(db.Integer, db.ForeignKey('mg_loans.id'), nullable=True, index=True)
+    loan_id = db.Column(db.Integer, db.ForeignKey('mg_loans.id'), nullable=True)
       # Basic transaction info
     reference = db.Column(db.String(100), unique=True, nullable=False, index=True)
     phone_number = db.Column(db.String(20), nullable=False)
@@ -75,47 +113,149 @@ class Transaction(db.Model):
         return f"{random_prefix}sl00a.{timestamp}.{loan_ref}"
     def to_dict(self):
         """Convert transaction to dictionary."""
-        amount = float(self.amount) if self.amount else 0.00
+        return self._serialize(
+            self,
+            self.loan.loan_id if self.loan else None,
+            self.user.full_name if self.user else 'Unknown'
+        )
+    
+    @classmethod
+    def projection_query(cls):
+        """Query the columns serialized by to_dict() without building ORM objects.
+        
+        The loan reference and customer name are joined in, so listing pages
+        avoid a lazy load per row. Serialize the rows with ``row_to_dict()``.
+        
+        Returns:
+            Query: Row query that accepts the usual filters and pagination
+        """
+        from models.loan import Loan
+        from models.user import User
+        
+        return db.session.query(
+            *cls.__table__.columns,
+            Loan.loan_id.label('loan_reference'),
+            User.full_name.label('customer_name')
+        ).outerjoin(Loan, Loan.id == cls.loan_id).outerjoin(User, User.id == cls.user_id)
+    
+    @classmethod
+    def row_to_dict(cls, row):
+        """Convert a ``projection_query()`` row to the ``to_dict()`` format."""
+        # Row attribute lookups are name-resolved each time; copy once instead
+        tx = SimpleNamespace(**dict(zip(row._fields, row)))
+        return cls._serialize(tx, tx.loan_reference, tx.customer_name or 'Unknown')
+    
+    # Columns shown in transaction tables; the Paynow/OTP payloads, URLs and
+    # free-text fields are left to the single-transaction endpoints.
+    LIST_COLUMNS = (
+        'id', 'reference', 'user_id', 'loan_id', 'phone_number', 'amount', 'method',
+        'transaction_type', 'status', 'paynow_reference', 'created_at', 'paid_at',
+        'completed_at'
+    )
+    
+    @classmethod
+    def listing_query(cls):
+        """Like ``projection_query()`` but limited to ``LIST_COLUMNS``.
+        
+        Serialize the rows with ``listing_row_to_dict()``.
+        
+        Returns:
+            Query: Row query that accepts the usual filters and pagination
+        """
+        from models.loan import Loan
+        from models.user import User
+        
+        return db.session.query(
+            *(cls.__table__.c[name] for name in cls.LIST_COLUMNS),
+            Loan.loan_id.label('loan_reference'),
+            User.full_name.label('customer_name')
+        ).outerjoin(Loan, Loan.id == cls.loan_id).outerjoin(User, User.id == cls.user_id)
+    
+    @staticmethod
+    def listing_row_to_dict(row):
+        """Convert a ``listing_query()`` row to a compact list entry."""
+        amount = float(row.amount) if row.amount else 0.00
         
         return {
-            'id': self.id,
-            'transaction_id': self.reference,  # Frontend expects transaction_id
-            'reference': self.reference,
-            'user_id': self.user_id,
-            'loan_id': self.loan_id,
-            'loan_reference': self.loan.loan_id if hasattr(self, 'loan') and self.loan else None,
-            'customer_name': self.user.full_name if hasattr(self, 'user') and self.user else 'Unknown',
-            'phone_number': self.phone_number,
+            'id': row.id,
+            'transaction_id': row.reference,  # Frontend expects transaction_id
+            'reference': row.reference,
+            'user_id': row.user_id,
+            'loan_id': row.loan_id,
+            'loan_reference': row.loan_reference,
+            'customer_name': row.customer_name or 'Unknown',
+            'phone_number': row.phone_number,
+            'amount': amount,
+            'fee': 0.00,
+            'total': amount,
+            'method': row.method,
+            'transaction_type': row.transaction_type,
+            'status': row.status,
+            'paynow_reference': row.paynow_reference,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'paid_at': row.paid_at.isoformat() if row.paid_at else None,
+            'completed_at': row.completed_at.isoformat() if row.completed_at else None,
+            'paid': Transaction.is_paid_value(row.paid_at, row.status)
+        }
+    
+    @staticmethod
+    def _serialize(tx, loan_reference, customer_name):
+        """Build the transaction dictionary from a model instance or row."""
+        amount = float(tx.amount) if tx.amount else 0.00
+        
+        return {
+            'id': tx.id,
+            'transaction_id': tx.reference,  # Frontend expects transaction_id
+            'reference': tx.reference,
+            'user_id': tx.user_id,
+            'loan_id': tx.loan_id,
+            'loan_reference': loan_reference,
+            'customer_name': customer_name,
+            'phone_number': tx.phone_number,
             'amount': amount,
             'fee': 0.00,  # Always 0 for simplicity
             'total': amount,  # Total = amount since fee is always 0
-            'method': self.method,
-            'transaction_type': self.transaction_type,
-            'poll_url': self.poll_url,
-            'status': self.status,
-            'instructions': self.instructions,
-            'paynow_reference': self.paynow_reference,
-            'hash': self.hash,
-            'redirect_url': self.redirect_url,
-            'has_redirect': self.has_redirect,
-            'remoteotpurl': self.remoteotpurl,
-            'otpreference': self.otpreference,
-            'description': self.description,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'paid_at': self.paid_at.isoformat() if self.paid_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'paynow_result': json.loads(self.paynow_result) if self.paynow_result else None,
-            'otp_response': json.loads(self.otp_response) if self.otp_response else None,
-            'is_test': self.is_test,
-            'paid': self.paid
+            'method': tx.method,
+            'transaction_type': tx.transaction_type,
+            'poll_url': tx.poll_url,
+            'status': tx.status,
+            'instructions': tx.instructions,
+            'paynow_reference': tx.paynow_reference,
+            'hash': tx.hash,
+            'redirect_url': tx.redirect_url,
+            'has_redirect': tx.has_redirect,
+            'remoteotpurl': tx.remoteotpurl,
+            'otpreference': tx.otpreference,
+            'description': tx.description,
+            'notes': tx.notes,
+            'created_at': tx.created_at.isoformat() if tx.created_at else None,
+            'updated_at': tx.updated_at.isoformat() if tx.updated_at else None,
+            'paid_at': tx.paid_at.isoformat() if tx.paid_at else None,
+            'completed_at': tx.completed_at.isoformat() if tx.completed_at else None,
+            'paynow_result': _load_json_column(tx.paynow_result),
+            'otp_response': _load_json_column(tx.otp_response),
+            'is_test': tx.is_test,
+            'paid': Transaction.is_paid_value(tx.paid_at, tx.status)
         }
     
+    @staticmethod
+    def is_paid_value(paid_at, status):
+        """Whether a transaction with these values counts as paid.
+        
+        A transaction is paid once ``paid_at`` is set or its status is
+        ``'paid'`` (any case). ``is_paid_clause()`` is the SQL form.
+        """
+        return paid_at is not None or status.lower() == 'paid'
+    
+    @classmethod
+    def is_paid_clause(cls):
+        """SQL expression for ``is_paid_value()``, for filters and aggregates."""
+        return or_(cls.paid_at.isnot(None), func.lower(cls.status) == 'paid')
+    
     @property
     def paid(self):
         """Check if transaction is paid."""
-        return self.paid_at is not None or self.status.lower() == 'paid'
+        return self.is_paid_value(self.paid_at, self.status)
     
     def mark_as_completed(self):
         """Mark transaction as completed and update loan."""
@@ -130,6 +270,7 @@ class Transaction(db.Model):
         
         # Save changes
         db.session.commit()
+        invalidate_dashboard_cache()
     
     def update_status(self, status, **kwargs):
         """Update transaction status and optional fields."""
@@ -159,27 +300,53 @@ class Transaction(db.Model):
     def __repr__(self):
         return f'<Transaction {self.reference}: {self.method} ${self.amount}>'
     
+    @classmethod
+    def search_filter(cls, term):
+        """Build a substring filter over reference, phone number and Paynow reference.
+        
+        Uses the trigram index when available (terms of 3+ characters), otherwise
+        falls back to ``LIKE '%term%'`` on each column. The fallback selects
+        matching ids in a subquery, which the database answers by scanning the
+        narrow ``ix_tx_search_columns`` index rather than whole table rows.
+        
+        Args:
+            term (str): Search text
+            
+        Returns:
+            ColumnElement: Filter expression for ``query.filter()``
+        """
+        match = trigram_match(cls.id, SEARCH_INDEX_TABLE, term)
+        if match is not None:
+            return match
+        
+        return cls.id.in_(select(cls.id).where(or_(
+            cls.reference.contains(term),
+            cls.phone_number.contains(term),
+            cls.paynow_reference.contains(term)
+        )))
+    
     @classmethod
     def get_summary_stats(cls):
         """Get transaction summary statistics for admin dashboard."""
-        from sqlalchemy import func
-        
-        # Overall stats
-        stats = db.session.query(
+        # Overall stats, status breakdown and last-24h count in one scan
+        # (CASE rather than FILTER, which SQL Server does not support). As a
+        # lambda statement it is built and compiled once; later calls only
+        # bind the new cutoff.
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        stats = db.session.execute(lambda_stmt(lambda: select(
             func.count(cls.id).label('total_transactions'),
             func.sum(cls.amount).label('total_amount'),
-            func.sum(cls.amount).filter(cls.status == 'completed').label('total_completed_amount')
-        ).first()
+            func.sum(case((cls.status == 'completed', cls.amount))).label('total_completed_amount'),
+            func.sum(case((cls.status == 'pending', 1), else_=0)).label('pending'),
+            func.sum(case((cls.status == 'completed', 1), else_=0)).label('completed'),
+            func.sum(case((cls.status.in_(['failed', 'cancelled']), 1), else_=0)).label('failed'),
+            func.sum(case((cls.created_at >= yesterday, 1), else_=0)).label('recent')
+        ))).one()
         
-        # Status breakdown
-        pending_count = cls.query.filter_by(status='pending').count()
-        completed_count = cls.query.filter_by(status='completed').count()
-        failed_count = cls.query.filter(cls.status.in_(['failed', 'cancelled'])).count()
-        
-        # Recent transactions (last 24 hours)
-        from datetime import timedelta
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        recent_count = cls.query.filter(cls.created_at >= yesterday).count()
+        pending_count = int(stats.pending or 0)
+        completed_count = int(stats.completed or 0)
+        failed_count = int(stats.failed or 0)
+        recent_count = int(stats.recent or 0)
         
         return {
             'total_transactions': stats.total_transactions or 0,
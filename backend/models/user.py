@@ -2,12 +2,21 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
-from utils.database import db
+from sqlalchemy import literal, orm, or_, func, case
+from utils.database import db, no_expire_on_commit, trigram_match
+
+# SQLite FTS5 trigram index created by add_user_search_index.py
+SEARCH_INDEX_TABLE = 'mg_users_search'
 
 class User(UserMixin, db.Model):
     """User model for admin authentication and customer management."""
     
     __tablename__ = 'mg_users'
+    __table_args__ = (
+        # Customer listings ordered newest first and the role/active/new-user
+        # counters; on SQL Server is_active is carried in the index.
+        db.Index('ix_user_role_created', 'role', 'created_at', mssql_include=['is_active']),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
@@ -20,7 +29,6 @@ class User(UserMixin, db.Model):
     
     # User type and status
     role = db.Column(db.String(20), default='admin', nullable=False)  # admin, customer
-    user_type = db.Column(db.String(20), default='admin', nullable=False)  # alias for role
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
     # Security fields
@@ -33,8 +41,17 @@ class User(UserMixin, db.Model):
     loans = db.relationship('Loan', backref='customer', lazy='dynamic')
     transactions = db.relationship('Transaction', backref='user', lazy='dynamic')
     
+    @property
+    def user_type(self):
+        """Alias for role (kept for API compatibility)."""
+        return self.role
+    
     def set_password(self, password):
-        """Set password hash."""
+        """Set password hash.
+        
+        Uses werkzeug's default (scrypt). Its pbkdf2 methods derive a single
+        digest-sized block, so there is no block-level work to parallelize.
+        """
         self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
@@ -72,14 +89,158 @@ class User(UserMixin, db.Model):
         db.session.commit()
     
     def reset_failed_attempts(self):
-        """Reset failed login attempts."""
-        self.failed_login_attempts = 0
-        self.locked_until = None
+        """Reset failed login attempts and record the login time.
+        
+        The counters are only touched when set, so a clean login updates
+        just ``last_login``.
+        """
+        if self.failed_login_attempts or self.locked_until is not None:
+            self.failed_login_attempts = 0
+            self.locked_until = None
         self.last_login = datetime.utcnow()
-        db.session.commit()
+        # The caller serializes this user right after login; keep it loaded
+        with no_expire_on_commit(db.session):
+            db.session.commit()
     
-    def to_dict(self):
-        """Convert to dictionary."""
+    @classmethod
+    def identity_conflict(cls, username, email, exclude_id=None):
+        """Check in one query whether a username or email is already taken.
+        
+        Args:
+            username (str): Username to check, or None/empty to skip it
+            email (str): Email to check, or None/empty to skip it
+            exclude_id (int): User being updated, whose own values don't count
+            
+        Returns:
+            str: ``'username'`` or ``'email'`` for the taken value (username
+                first when both are), or None when both are free
+        """
+        claims = []
+        if username:
+            claims.append(cls.username == username)
+        if email:
+            claims.append(cls.email == email)
+        if not claims:
+            return None
+        
+        query = db.session.query(
+            func.max(case((cls.username == username, 1), else_=0)) if username else literal(0),
+            func.max(case((cls.email == email, 1), else_=0)) if email else literal(0)
+        ).filter(or_(*claims))
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        username_taken, email_taken = query.one()
+        if username_taken:
+            return 'username'
+        if email_taken:
+            return 'email'
+        return None
+    
+    @classmethod
+    def search_filter(cls, term):
+        """Build a substring filter over full name, username, email and phone number.
+        
+        Uses the trigram index when available (terms of 3+ characters, which
+        the trigram tokenizer needs), otherwise falls back to case-insensitive
+        ``LIKE '%term%'`` on each column.
+        
+        Args:
+            term (str): Search text
+            
+        Returns:
+            ColumnElement: Filter expression for ``query.filter()``
+        """
+        match = trigram_match(cls.id, SEARCH_INDEX_TABLE, term)
+        if match is not None:
+            return match
+        
+        pattern = f'%{term}%'
+        return or_(
+            cls.full_name.ilike(pattern),
+            cls.username.ilike(pattern),
+            cls.email.ilike(pattern),
+            cls.phone_number.ilike(pattern)
+        )
+    
+    @orm.reconstructor
+    def _cache_created_iso(self):
+        """Format the immutable creation timestamp once when loaded from the DB."""
+        self._created_iso = self.created_at.isoformat() if self.created_at else None
+    
+    @property
+    def created_iso(self):
+        """ISO-formatted created_at, cached for rows loaded from the DB."""
+        cached = self.__dict__.get('_created_iso')
+        if cached is None:
+            cached = self._created_iso = self.created_at.isoformat()
+        return cached
+    
+    @classmethod
+    def listing_query(cls):
+        """Query the columns serialized by to_dict() without building ORM objects.
+        
+        Active loan count and outstanding total come from one grouped
+        subquery instead of a loans query per customer. Serialize the rows
+        with ``row_to_dict()``.
+        
+        Returns:
+            Query: Row query that accepts the usual filters and ordering
+        """
+        from models.loan import Loan
+        
+        active = db.session.query(
+            Loan.user_id,
+            db.func.count(Loan.id).label('active_loans_count'),
+            db.func.sum(Loan.outstanding_balance).label('total_outstanding')
+        ).filter(
+            Loan.status == 'active', Loan.outstanding_balance > 0
+        ).group_by(Loan.user_id).subquery()
+        
+        return db.session.query(
+            cls.id, cls.username, cls.email, cls.full_name, cls.phone_number,
+            cls.role, cls.is_active, cls.created_at, cls.last_login,
+            active.c.active_loans_count, active.c.total_outstanding
+        ).outerjoin(active, active.c.user_id == cls.id)
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Convert a ``listing_query()`` row to the ``to_dict()`` format."""
+        active_loans_count = total_outstanding = None
+        if row.role == 'customer':
+            active_loans_count = row.active_loans_count or 0
+            total_outstanding = float(row.total_outstanding or 0)
+        
+        return {
+            'id': row.id,
+            'username': row.username,
+            'email': row.email,
+            'full_name': row.full_name,
+            'phone_number': row.phone_number,
+            'role': row.role,
+            'user_type': row.role,  # alias for compatibility
+            'is_active': row.is_active,
+            'active_loans_count': active_loans_count,
+            'total_outstanding': total_outstanding,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'last_login': row.last_login.isoformat() if row.last_login else None
+        }
+    
+    def to_dict(self, active_loans=None):
+        """Convert to dictionary.
+        
+        Args:
+            active_loans (list): Already-loaded active loans, to skip reloading them
+        """
+        last_login = self.last_login
+        
+        # Load active loans once instead of once per derived field
+        active_loans_count = total_outstanding = None
+        if self.role == 'customer':
+            if active_loans is None:
+                active_loans = self.active_loans
+            active_loans_count = len(active_loans)
+            total_outstanding = sum(float(loan.outstanding_balance) for loan in active_loans)
+        
         return {
             'id': self.id,
             'username': self.username,
@@ -89,10 +250,10 @@ class User(UserMixin, db.Model):
             'role': self.role,
             'user_type': self.role,  # alias for compatibility
             'is_active': self.is_active,
-            'active_loans_count': len(self.active_loans) if self.role == 'customer' else None,
-            'total_outstanding': self.total_outstanding if self.role == 'customer' else None,
-            'created_at': self.created_at.isoformat(),
-            'last_login': self.last_login.isoformat() if self.last_login else None
+            'active_loans_count': active_loans_count,
+            'total_outstanding': total_outstanding,
+            'created_at': self.created_iso,
+            'last_login': last_login.isoformat() if last_login else None
         }
 
 class LoginAttempt(db.Model):
@@ -3,6 +3,8 @@
 """Authentication routes."""
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
 from flask_login import login_user, logout_user, current_user, login_required
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
 from models.user import User, LoginAttempt
 from services.auth_service import AuthService
 from utils.security import csrf_required, rate_limit, api_login_required
@@ -15,6 +17,8 @@ auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 @rate_limit(max_requests=10, window=300)  # 10 attempts per 5 minutes
 def login():
     """Admin login page and handler."""
+    is_xhr = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
     if current_user.is_authenticated:
         return redirect('/admin/')
     
@@ -23,9 +27,10 @@ def login():
         return render_template('auth/login.html', csrf_token=csrf_token)
     
     # Handle login attempt
-    username = request.form.get('username', '').strip()
-    password = request.form.get('password', '')
-    csrf_token = request.form.get('csrf_token')
+    form = request.form
+    username = form.get('username', '').strip()
+    password = form.get('password', '')
+    csrf_token = form.get('csrf_token')
     
     # Validate CSRF token
     if not AuthService.validate_csrf_token(csrf_token):
@@ -44,16 +49,17 @@ def login():
     )
     
     if result['success']:
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        if is_xhr:
             return success_response(result)
         else:
             return redirect('/admin/')
     else:
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        if is_xhr:
             return error_response(result['message'], 401)
         else:
-            flash(result['message'], 'error')
-            return redirect('/auth/login')
+            # Re-render in place instead of redirecting back to GET /auth/login
+            return render_template('auth/login.html', csrf_token=csrf_token,
+                                   error=result['message']), 401
 
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
@@ -111,42 +117,38 @@ def setup():
         if missing_fields:
             return jsonify({'error': f'Missing required fields: {", ".join(missing_fields)}'}), 400
         
-        # Check if username already exists
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': f'Username "{data["username"]}" already exists'}), 400
-        
-        # Check if email already exists
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': f'Email "{data["email"]}" already exists'}), 400
+        # Check username and email uniqueness in a single round-trip
+        conflict = User.identity_conflict(data['username'], data['email'])
+        if conflict:
+            return jsonify({'error': f'{conflict.capitalize()} "{data[conflict]}" already exists'}), 400
         
         # Validate password length
         if len(data['password']) < 6:
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
         
-        # Create admin user
-        admin = User(
-            username=data['username'],
-            email=data['email'],
-            full_name=data['full_name'],
-            phone_number=data.get('phone_number', ''),
-            role='admin',
-            user_type='admin',
-            is_active=True
-        )
-        
-        admin.set_password(data['password'])
-        
-        db.session.add(admin)
+        # Create admin user with a single INSERT ... RETURNING (no ORM unit of work)
+        row = db.session.execute(
+            insert(User).values(
+                username=data['username'],
+                email=data['email'],
+                password_hash=generate_password_hash(data['password']),
+                full_name=data['full_name'],
+                phone_number=data.get('phone_number', ''),
+                role='admin',
+                is_active=True
+            ).returning(User.id, User.username)
+        ).one()
         db.session.commit()
+        admin_id, admin_username = row.id, row.username
         
-        print(f"✅ Admin user created: {admin.username} (ID: {admin.id})")
+        print(f"✅ Admin user created: {admin_username} (ID: {admin_id})")
         
         if request.is_json:
             return jsonify({
                 'success': True,
                 'message': 'Admin user created successfully',
-                'admin_id': admin.id,
-                'username': admin.username
+                'admin_id': admin_id,
+                'username': admin_username
             }), 201
         else:
             flash('Admin user created successfully! You can now login.', 'success')
@@ -161,7 +163,6 @@ def setup():
         if request.is_json:
             return jsonify({'error': error_msg}), 500
         else:
-            flash(error_msg, 'error')
             csrf_token = AuthService.generate_csrf_token()
             return render_template('auth/setup.html', csrf_token=csrf_token, error=error_msg)
 
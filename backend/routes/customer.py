@@ -1,14 +1,22 @@
 """Customer routes for loan management."""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, current_app
 from flask_login import login_user, login_required, current_user, logout_user
 from models.user import User, LoginAttempt
 from models.loan import Loan
 from models.transaction import Transaction
 from utils.database import db
-from utils.responses import APIResponse
+from utils.responses import APIResponse, stream_success_response
 from utils.validators import PaymentValidator, ValidationError
 from services.payment_service import PaymentService
+from services.login_attempt_service import login_attempt_recorder
+from services.payment_dispatch_service import payment_dispatcher
+from utils.security import rate_limit, throttle_exceeded
+from utils.pagination import keyset_paginate, offset_paginate
+from utils.cache import invalidate_dashboard_cache
+from werkzeug.exceptions import HTTPException
 from datetime import datetime
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import selectinload, load_only
 
 customer_bp = Blueprint('customer', __name__, url_prefix='/customer')
 
@@ -20,305 +28,306 @@ def init_customer_routes(service):
     global payment_service
     payment_service = service
 
+# Endpoints that handle their own authentication
+UNGUARDED_ENDPOINTS = {'customer.login', 'customer.logout'}
+
+@customer_bp.before_request
+def require_customer():
+    """Resolve the logged-in customer once per request into ``g.user``."""
+    if request.endpoint in UNGUARDED_ENDPOINTS:
+        return None
+    
+    user = current_user._get_current_object()
+    if not user.is_authenticated:
+        return current_app.login_manager.unauthorized()
+    if user.role != 'customer':
+        return APIResponse.error('Access denied', status_code=403)
+    
+    g.user = user
+
+@customer_bp.errorhandler(ValidationError)
+def handle_validation_error(e):
+    """Return validation failures raised by customer views as 400s."""
+    return APIResponse.validation_error(str(e))
+
+@customer_bp.errorhandler(Exception)
+def handle_unexpected_error(e):
+    """Roll back and return a JSON 500 for errors raised by customer views."""
+    if isinstance(e, HTTPException):
+        return APIResponse.error(e.description, status_code=e.code)
+    
+    db.session.rollback()
+    current_app.logger.exception(e)
+    return APIResponse.internal_error(f'Request failed: {str(e)}')
+
 @customer_bp.route('/login', methods=['POST'])
+@rate_limit(max_requests=10, window=300)  # 10 attempts per 5 minutes per IP
 def login():
     """Customer login endpoint."""
-    try:
-        data = request.get_json()
-        if not data:
-            return APIResponse.validation_error('No data provided')
+    data = request.get_json()
+    if not data:
+        return APIResponse.validation_error('No data provided')
+    
+    username = data.get('username')
+    password = data.get('password')
+    
+    if not username or not password:
+        return APIResponse.validation_error('Username and password required')
+    
+    # Per-username throttle, checked before touching the database
+    if throttle_exceeded(f"login:{username}", max_requests=10, window=60):
+        return APIResponse.error('Too many login attempts, please try again later', status_code=429)
+    
+    # Log login attempt
+    ip_address = request.remote_addr
+    user_agent = request.headers.get('User-Agent', '')
+    
+    # Find user (customer only)
+    user = User.query.filter_by(username=username, role='customer', is_active=True).first()
+    
+    if user and user.check_password(password):
+        # Check if account is locked
+        if user.is_locked():
+            return APIResponse.error('Account is temporarily locked due to failed login attempts', 423)
         
-        username = data.get('username')
-        password = data.get('password')
+        # Successful login
+        login_user(user)
+        user.reset_failed_attempts()
         
-        if not username or not password:
-            return APIResponse.validation_error('Username and password required')
+        # Log successful attempt
+        login_attempt_recorder.record(username, ip_address, user_agent, True)
         
-        # Log login attempt
-        ip_address = request.remote_addr
-        user_agent = request.headers.get('User-Agent', '')
+        return APIResponse.success({
+            'user': user.to_dict(),
+            'message': 'Login successful'
+        })
+    else:
+        # Failed login
+        if user:
+            user.increment_failed_attempts()
         
-        # Find user (customer only)
-        user = User.query.filter_by(username=username, role='customer', is_active=True).first()
+        # Log failed attempt
+        login_attempt_recorder.record(username, ip_address, user_agent, False)
         
-        if user and user.check_password(password):
-            # Check if account is locked
-            if user.is_locked():
-                return APIResponse.error('Account is temporarily locked due to failed login attempts', 423)
-            
-            # Successful login
-            login_user(user)
-            user.reset_failed_attempts()
-            
-            # Log successful attempt
-            attempt = LoginAttempt(
-                username=username,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                success=True
-            )
-            db.session.add(attempt)
-            db.session.commit()
-            
-            return APIResponse.success({
-                'user': user.to_dict(),
-                'message': 'Login successful'
-            })
-        else:
-            # Failed login
-            if user:
-                user.increment_failed_attempts()
-            
-            # Log failed attempt
-            attempt = LoginAttempt(
-                username=username,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                success=False
-            )
-            db.session.add(attempt)
-            db.session.commit()
-            
-            return APIResponse.error('Invalid credentials', 401)
-            
-    except Exception as e:
-        return APIResponse.internal_error(f'Login failed: {str(e)}')
+        return APIResponse.error('Invalid credentials', 401)
 
 @customer_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     """Customer logout endpoint."""
-    try:
-        logout_user()
-        return APIResponse.success({'message': 'Logout successful'})
-    except Exception as e:
-        return APIResponse.internal_error(f'Logout failed: {str(e)}')
+    logout_user()
+    return APIResponse.success({'message': 'Logout successful'})
 
 @customer_bp.route('/profile', methods=['GET'])
-@login_required
 def get_profile():
     """Get customer profile."""
-    try:
-        if current_user.role != 'customer':
-            return APIResponse.error('Access denied', 403)
-        
-        return APIResponse.success({
-            'user': current_user.to_dict()
-        })
-    except Exception as e:
-        return APIResponse.internal_error(f'Failed to get profile: {str(e)}')
+    return APIResponse.success({
+        'user': g.user.to_dict()
+    })
 
 @customer_bp.route('/loans', methods=['GET'])
-@login_required
 def get_user_loans():
     """Get customer's loans with detailed information."""
-    try:
-        if current_user.role != 'customer':
-            return APIResponse.error('Access denied', 403)
-        
-        # Get all loans for the customer
-        loans = Loan.query.filter_by(user_id=current_user.id).order_by(Loan.created_at.desc()).all()
-        loans_data = [loan.to_dict() for loan in loans]
-        
-        # Calculate summary
-        active_loans = [loan for loan in loans_data if loan['is_active']]
-        total_outstanding = sum(loan['outstanding_balance'] for loan in active_loans)
-        total_original = sum(loan['original_amount'] for loan in loans_data)
-        total_paid = sum(loan['paid_amount'] for loan in loans_data)
-        
-        return APIResponse.success({
-            'loans': loans_data,
-            'summary': {
-                'total_loans': len(loans_data),
-                'active_loans': len(active_loans),
-                'completed_loans': len([l for l in loans_data if l['status'] == 'completed']),
-                'total_outstanding': total_outstanding,
-                'total_original_amount': total_original,
-                'total_paid_amount': total_paid
-            }
-        })
-        
-    except Exception as e:
-        return APIResponse.internal_error(f'Failed to get loans: {str(e)}')
+    # Get all loans for the customer
+    loans = Loan.query.options(selectinload(Loan.customer)).filter_by(
+        user_id=g.user.id
+    ).order_by(Loan.created_at.desc()).all()
+    loans_data = [loan.to_dict() for loan in loans]
+    
+    # Calculate summary in a single aggregate query
+    is_active = and_(Loan.status == 'active', Loan.outstanding_balance > 0)
+    summary = db.session.query(
+        func.count(Loan.id).label('total_loans'),
+        func.sum(case((is_active, 1), else_=0)).label('active_loans'),
+        func.sum(case((Loan.status == 'completed', 1), else_=0)).label('completed_loans'),
+        func.sum(case((is_active, Loan.outstanding_balance), else_=0)).label('total_outstanding'),
+        func.sum(Loan.original_amount).label('total_original'),
+        func.sum(Loan.original_amount - Loan.outstanding_balance).label('total_paid')
+    ).filter(Loan.user_id == g.user.id).one()
+    
+    return APIResponse.success({
+        'loans': loans_data,
+        'summary': {
+            'total_loans': summary.total_loans,
+            'active_loans': int(summary.active_loans or 0),
+            'completed_loans': int(summary.completed_loans or 0),
+            'total_outstanding': float(summary.total_outstanding or 0),
+            'total_original_amount': float(summary.total_original or 0),
+            'total_paid_amount': float(summary.total_paid or 0)
+        }
+    })
 
 @customer_bp.route('/loan/<loan_id>', methods=['GET'])
-@login_required
 def get_loan_details(loan_id):
     """Get detailed loan information including payment history."""
-    try:
-        if current_user.role != 'customer':
-            return APIResponse.error('Access denied', 403)
-        
-        # Find loan
-        loan = Loan.query.filter_by(
-            loan_id=loan_id, 
-            user_id=current_user.id
-        ).first()
-        
-        if not loan:
-            return APIResponse.not_found('Loan not found')
-        
-        # Get payment history
-        transactions = Transaction.query.filter_by(
-            loan_id=loan.id,
-            user_id=current_user.id
-        ).order_by(Transaction.created_at.desc()).all()
-        
-        transactions_data = [tx.to_dict() for tx in transactions]
-        
-        return APIResponse.success({
-            'loan': loan.to_dict(),
-            'payment_history': transactions_data,
-            'payment_summary': {
-                'total_payments': len(transactions_data),
-                'completed_payments': len([tx for tx in transactions_data if tx['paid']]),
-                'pending_payments': len([tx for tx in transactions_data if not tx['paid']]),
-                'total_paid_via_transactions': sum(tx['amount'] for tx in transactions_data if tx['paid'])
-            }
-        })
-        
-    except Exception as e:
-        return APIResponse.internal_error(f'Failed to get loan details: {str(e)}')
+    # Find loan
+    loan = Loan.query.filter_by(
+        loan_id=loan_id, 
+        user_id=g.user.id
+    ).first()
+    
+    if not loan:
+        return APIResponse.not_found('Loan not found')
+    
+    # Get payment history
+    transactions = Transaction.projection_query().filter(
+        Transaction.loan_id == loan.id,
+        Transaction.user_id == g.user.id
+    ).order_by(Transaction.created_at.desc()).all()
+    
+    transactions_data = [Transaction.row_to_dict(row) for row in transactions]
+    
+    return APIResponse.success({
+        'loan': loan.to_dict(),
+        'payment_history': transactions_data,
+        'payment_summary': {
+            'total_payments': len(transactions_data),
+            'completed_payments': len([tx for tx in transactions_data if tx['paid']]),
+            'pending_payments': len([tx for tx in transactions_data if not tx['paid']]),
+            'total_paid_via_transactions': sum(tx['amount'] for tx in transactions_data if tx['paid'])
+        }
+    })
 
 @customer_bp.route('/loan/<loan_id>/payment', methods=['POST'])
-@login_required
 def make_payment(loan_id):
-    """Make a payment for a specific loan."""
-    from utils.validators import PaymentValidator
-    from models.loan import Loan
-    from models.transaction import Transaction
-    from services.payment_service import PaymentService
+    """Make a payment for a specific loan.
+    
+    The transaction is saved as pending and sent to Paynow in the background;
+    poll ``/payment/status/<reference>`` for the outcome.
+    """
     data = request.get_json() or {}
-    try:
-        amount = PaymentValidator.validate_amount(data.get('amount'))
-        phone = PaymentValidator.validate_phone_number(data.get('phone_number'))
-        method = PaymentValidator.validate_method(data.get('method'))
-    except Exception as e:
-        return APIResponse.validation_error(str(e))
-    loan = Loan.query.filter_by(loan_id=loan_id, user_id=current_user.id).first()
+    payment = PaymentValidator.validate_payment_request({
+        'phoneNumber': data.get('phone_number'),
+        'amount': data.get('amount'),
+        'method': data.get('method')
+    })
+    loan = Loan.query.options(load_only(Loan.id, Loan.outstanding_balance)).filter_by(
+        loan_id=loan_id, user_id=g.user.id
+    ).first()
     if not loan:
         return APIResponse.not_found('Loan not found')
-    if amount > loan.outstanding_balance:
-        return APIResponse.error('Amount exceeds balance',400)
-    tx = Transaction(user_id=current_user.id, loan_id=loan.id, amount=amount, phone_number=phone, method=method, transaction_type='loan_payment')
+    if payment['amount'] > loan.outstanding_balance:
+        return APIResponse.error('Amount exceeds balance', status_code=400)
+    tx = Transaction(user_id=g.user.id, loan_id=loan.id, amount=payment['amount'],
+                     phone_number=payment['phoneNumber'], method=payment['method'],
+                     transaction_type='loan_payment', status='pending')
     db.session.add(tx)
     db.session.commit()
-    # initiate external process
-    if payment_service:
-        payment_service.process_transaction(tx.reference)
-    return APIResponse.success(tx.to_dict(), 'Payment initiated',201)
+    invalidate_dashboard_cache()
+    tx_data = tx.to_dict()
+    
+    # Paynow round-trip happens off the request thread
+    payment_dispatcher.dispatch(tx.reference)
+    return APIResponse.success(tx_data, 'Payment initiated',201)
 
 @customer_bp.route('/transactions', methods=['GET'])
-@login_required
 def get_customer_transactions():
     """Get customer's transaction history."""
-    try:
-        if current_user.role != 'customer':
-            return APIResponse.error('Access denied', 403)
-        
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
-        
-        # Get transactions
-        transactions_query = Transaction.query.filter_by(
-            user_id=current_user.id
-        ).order_by(Transaction.created_at.desc())
-        
-        transactions_paginated = transactions_query.paginate(
-            page=page, per_page=per_page, error_out=False
+    # Get pagination parameters
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    
+    # Get transactions
+    transactions_query = Transaction.projection_query().filter(
+        Transaction.user_id == g.user.id
+    )
+    
+    # Keyset pagination when a cursor is supplied (no OFFSET walk, no COUNT)
+    if 'cursor' in request.args:
+        rows, next_cursor = keyset_paginate(
+            transactions_query, Transaction.created_at, Transaction.id,
+            request.args.get('cursor'), per_page
         )
-        
-        transactions_data = [tx.to_dict() for tx in transactions_paginated.items]
-        
-        return APIResponse.success({
-            'transactions': transactions_data,
+        return stream_success_response(map(Transaction.row_to_dict, rows), 'transactions', {
             'pagination': {
-                'page': page,
                 'per_page': per_page,
-                'total': transactions_paginated.total,
-                'pages': transactions_paginated.pages,
-                'has_next': transactions_paginated.has_next,
-                'has_prev': transactions_paginated.has_prev
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
             }
-        })
-        
-    except Exception as e:
-        return APIResponse.internal_error(f'Failed to get transactions: {str(e)}')
+        }, flat=True)
+    
+    # Page rows and total count in one round-trip
+    transactions_paginated = offset_paginate(
+        transactions_query.order_by(Transaction.created_at.desc()), page, per_page
+    )
+    
+    # Dicts are built and encoded one at a time while the body streams
+    items = map(Transaction.row_to_dict, transactions_paginated.items)
+    return stream_success_response(items, 'transactions', {
+        'pagination': {
+            'page': transactions_paginated.page,
+            'per_page': transactions_paginated.per_page,
+            'total': transactions_paginated.total,
+            'pages': transactions_paginated.pages,
+            'has_next': transactions_paginated.has_next,
+            'has_prev': transactions_paginated.has_prev
+        }
+    }, flat=True)
 
 @customer_bp.route('/payment/status/<reference>', methods=['GET'])
-@login_required
 def check_payment_status(reference):
     """Check payment status for customer's transaction."""
-    try:
-        if current_user.role != 'customer':
-            return APIResponse.error('Access denied', 403)
-        
-        # Validate reference
-        validated_reference = PaymentValidator.validate_reference(reference)
-        
-        # Find transaction belonging to current user
-        transaction = Transaction.query.filter_by(
-            reference=validated_reference,
-            user_id=current_user.id
-        ).first()
-        
-        if not transaction:
-            return APIResponse.not_found('Transaction not found')
-        
-        # Check payment status
-        result = payment_service.check_payment_status(validated_reference)
-        
-        if 'error' in result:
-            return APIResponse.error(result['error'])
-        
-        # If payment is completed, update loan balance
-        if result.get('paid') and not transaction.paid:
+    # Validate reference
+    validated_reference = PaymentValidator.validate_reference(reference)
+    
+    # Ownership check only: fetch the id, not a full Transaction
+    owned = db.session.query(Transaction.id).filter_by(
+        reference=validated_reference,
+        user_id=g.user.id
+    ).first()
+    
+    if not owned:
+        return APIResponse.not_found('Transaction not found')
+    
+    # Check payment status
+    result = payment_service.check_payment_status(validated_reference)
+    
+    if 'error' in result:
+        return APIResponse.error(result['error'])
+    
+    # If payment is completed, update loan balance
+    if result.get('paid'):
+        transaction = db.session.get(Transaction, owned.id)
+        if not transaction.paid:
             transaction.mark_as_completed()
-        
-        return APIResponse.success(result, "Payment status retrieved")
     
-    except ValidationError as e:
-        return APIResponse.validation_error(str(e))
-    except Exception as e:
-        return APIResponse.internal_error(f"Status check failed: {str(e)}")
+    return APIResponse.success(result, "Payment status retrieved")
 
 # Customer dashboard summary
 @customer_bp.route('/dashboard', methods=['GET'])
-@login_required
 def get_dashboard():
     """Get customer dashboard data."""
-    try:
-        if current_user.role != 'customer':
-            return APIResponse.error('Access denied', 403)
-        
-        # Get active loans
-        active_loans = current_user.active_loans
-        
-        # Get recent transactions (last 10)
-        recent_transactions = Transaction.query.filter_by(
-            user_id=current_user.id
-        ).order_by(Transaction.created_at.desc()).limit(10).all()
-        
-        # Calculate summary
-        total_outstanding = sum(float(loan.outstanding_balance) for loan in active_loans)
-        total_original = sum(float(loan.original_amount) for loan in current_user.loans)
-        total_paid = total_original - total_outstanding
-        
-        dashboard_data = {
-            'user': current_user.to_dict(),
-            'summary': {
-                'active_loans': len(active_loans),
-                'total_loans': current_user.loans.count(),
-                'total_outstanding': total_outstanding,
-                'total_paid': total_paid,
-                'payment_progress': round((total_paid / max(total_original, 1)) * 100, 2)
-            },
-            'active_loans': [loan.to_dict() for loan in active_loans],
-            'recent_transactions': [tx.to_dict() for tx in recent_transactions]
-        }
-        
-        return APIResponse.success(dashboard_data)
-        
-    except Exception as e:
-        return APIResponse.internal_error(f'Failed to get dashboard: {str(e)}')
+    # Get active loans (loaded once, reused for the user payload)
+    is_active = and_(Loan.status == 'active', Loan.outstanding_balance > 0)
+    active_loans = g.user.loans.filter(is_active).all()
+    
+    # Get recent transactions (last 10)
+    recent_transactions = Transaction.query.filter_by(
+        user_id=g.user.id
+    ).order_by(Transaction.created_at.desc()).limit(10).all()
+    
+    # Calculate summary in a single aggregate query
+    totals = db.session.query(
+        func.count(Loan.id).label('total_loans'),
+        func.sum(Loan.original_amount).label('total_original'),
+        func.sum(case((is_active, Loan.outstanding_balance), else_=0)).label('total_outstanding')
+    ).filter(Loan.user_id == g.user.id).one()
+    
+    total_outstanding = float(totals.total_outstanding or 0)
+    total_original = float(totals.total_original or 0)
+    total_paid = total_original - total_outstanding
+    
+    dashboard_data = {
+        'user': g.user.to_dict(active_loans=active_loans),
+        'summary': {
+            'active_loans': len(active_loans),
+            'total_loans': totals.total_loans,
+            'total_outstanding': total_outstanding,
+            'total_paid': total_paid,
+            'payment_progress': round((total_paid / max(total_original, 1)) * 100, 2)
+        },
+        'active_loans': [loan.to_dict() for loan in active_loans],
+        'recent_transactions': [tx.to_dict() for tx in recent_transactions]
+    }
+    
+    return APIResponse.success(dashboard_data)
@@ -1,15 +1,24 @@
 """Dashboard routes for admin interface."""
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, case, and_, select, lambda_stmt, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, contains_eager
 from utils.validators import PaymentValidator, ValidationError, validate_json_data
 from models.transaction import Transaction
-from utils.database import db
-from utils.responses import APIResponse, success_response, error_response
-from utils.security import login_required, admin_required, csrf_required, rate_limit, api_admin_required
+from models.loan import Loan
+from models.user import User
+from utils.database import db, day_of, approximate_row_count, no_expire_on_commit, submit_in_app_context
+from utils.responses import APIResponse, success_response, error_response, stream_success_response, conditional_success_response
+from utils.cache import cached, invalidate, cache_stats, invalidate_dashboard_cache, wants_fresh
+from utils.pagination import keyset_paginate, offset_paginate
+from utils.security import login_required, admin_required, csrf_required, rate_limit, api_admin_required, concurrency_limit
 from services.auth_service import AuthService
 from services.payment_service import PaymentService
+from services.payment_dispatch_service import payment_dispatcher
 from flasgger import swag_from
+from werkzeug.security import generate_password_hash
 
 # Initialize payment service
 payment_service = None
@@ -29,9 +38,118 @@ def dashboard_home():
     csrf_token = AuthService.generate_csrf_token()
     return render_template('dashboard/enhanced.html', csrf_token=csrf_token)
 
+# Seconds the /api/stats and /api/overview payloads are reused. Writes drop
+# them early via invalidate_dashboard_cache().
+DASHBOARD_CACHE_TTL = 60
+
+# The stats statements are lambda_stmt()s: SQLAlchemy builds each expression
+# tree and its cache key once, and only re-binds the captured dates per request.
+
+def _stats_totals_stmt(today_start, today_end):
+    """Transaction totals, status counts and today's figures."""
+    return lambda_stmt(lambda: select(
+        func.count(Transaction.id).label('total_transactions'),
+        func.coalesce(func.sum(Transaction.amount), 0).label('total_amount'),
+        func.sum(case((Transaction.status == 'paid', 1), else_=0)).label('successful'),
+        func.sum(case((Transaction.status.in_(['pending', 'sent']), 1), else_=0)).label('pending'),
+        func.sum(case((Transaction.status == 'cancelled', 1), else_=0)).label('failed'),
+        func.sum(case((and_(Transaction.created_at >= today_start,
+                            Transaction.created_at < today_end), 1), else_=0)).label('today_transactions'),
+        func.sum(case((and_(Transaction.created_at >= today_start,
+                            Transaction.created_at < today_end), Transaction.amount),
+                      else_=0)).label('today_amount')
+    ))
+
+def _weekly_trend_stmt(week_start, week_end):
+    """Per-day transaction count and amount from ``week_start`` up to ``week_end``."""
+    return lambda_stmt(lambda: select(
+        day_of(Transaction.created_at).label('date'),
+        func.count(Transaction.id).label('count'),
+        func.sum(Transaction.amount).label('amount')
+    ).where(
+        Transaction.created_at >= week_start,
+        Transaction.created_at < week_end
+    ).group_by(day_of(Transaction.created_at)).order_by(day_of(Transaction.created_at)))
+
+def _past_days_trend(week_start, today_start):
+    """Weekly trend rows for the finished days before today.
+
+    Those days no longer change, so the grouped scan runs once per day and
+    the rows are cached until midnight (UTC).
+    """
+    def load():
+        return [
+            {
+                'date': str(stat.date),
+                'count': stat.count,
+                'amount': float(stat.amount or 0)
+            } for stat in db.session.execute(_weekly_trend_stmt(week_start, today_start))
+        ]
+    
+    until_midnight = (today_start + timedelta(days=1) - datetime.utcnow()).total_seconds()
+    return cached(f"dashboard:trend:{today_start.date().isoformat()}",
+                  max(int(until_midnight), 1), load)
+
+def _loan_status_counts_stmt():
+    """Loan count per status."""
+    return lambda_stmt(lambda: select(Loan.status, func.count(Loan.id)).group_by(Loan.status))
+
+def _method_breakdown_stmt():
+    """Transaction count and amount per payment method."""
+    return lambda_stmt(lambda: select(
+        Transaction.method,
+        func.count(Transaction.id).label('count'),
+        func.sum(Transaction.amount).label('amount')
+    ).group_by(Transaction.method))
+
+def _dashboard_stats():
+    """Compute the /api/stats payload."""
+    # Get date ranges
+    today = datetime.utcnow().date()
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    
+    # Totals, status breakdown and today's stats in a single scan
+    today_start = datetime.combine(today, datetime.min.time())
+    totals = db.session.execute(
+        _stats_totals_stmt(today_start, today_start + timedelta(days=1))
+    ).one()
+    
+    # Weekly trend: finished days are computed once a day; today's bucket
+    # is the today_* figures from the totals above
+    weekly_trend = _past_days_trend(datetime.combine(week_ago, datetime.min.time()), today_start)
+    if totals.today_transactions:
+        weekly_trend = weekly_trend + [{
+            'date': today.isoformat(),
+            'count': int(totals.today_transactions),
+            'amount': float(totals.today_amount or 0)
+        }]
+    
+    # Payment method breakdown
+    method_stats = db.session.execute(_method_breakdown_stmt()).all()
+    
+    return {
+        'total_transactions': totals.total_transactions,
+        'total_amount': float(totals.total_amount),
+        'successful_payments': int(totals.successful or 0),
+        'pending_payments': int(totals.pending or 0),
+        'failed_payments': int(totals.failed or 0),
+        'today_transactions': int(totals.today_transactions or 0),
+        'today_amount': float(totals.today_amount or 0),
+        'weekly_trend': weekly_trend,
+        'method_breakdown': [
+            {
+                'method': stat.method,
+                'count': stat.count,
+                'amount': float(stat.amount or 0)
+            } for stat in method_stats
+        ]
+    }
+
 @dashboard_bp.route('/api/stats')
 @api_admin_required
 @rate_limit(max_requests=30, window=60)
+@concurrency_limit(max_concurrent=3)
 def get_dashboard_stats():
     """
     Get dashboard statistics
@@ -60,146 +178,108 @@ def get_dashboard_stats():
               type: number
     """
     try:
-        # Get date ranges
-        today = datetime.utcnow().date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        
-        # Total stats
-        total_transactions = Transaction.query.count()
-        total_amount = db.session.query(func.sum(Transaction.amount)).scalar() or 0
-        
-        # Status breakdown
-        successful = Transaction.query.filter_by(status='paid').count()
-        pending = Transaction.query.filter(Transaction.status.in_(['pending', 'sent'])).count()
-        failed = Transaction.query.filter_by(status='cancelled').count()
-        
-        # Today's stats
-        today_transactions = Transaction.query.filter(
-            func.date(Transaction.created_at) == today
-        ).count()
-        
-        today_amount = db.session.query(func.sum(Transaction.amount)).filter(
-            func.date(Transaction.created_at) == today
-        ).scalar() or 0
-        
-        # Weekly trend
-        weekly_stats = db.session.query(
-            func.date(Transaction.created_at).label('date'),
-            func.count(Transaction.id).label('count'),
-            func.sum(Transaction.amount).label('amount')
-        ).filter(
-            Transaction.created_at >= week_ago
-        ).group_by(
-            func.date(Transaction.created_at)
-        ).all()
-        
-        # Payment method breakdown
-        method_stats = db.session.query(
-            Transaction.method,
-            func.count(Transaction.id).label('count'),
-            func.sum(Transaction.amount).label('amount')
-        ).group_by(Transaction.method).all()
-        
-        return success_response({
-            'total_transactions': total_transactions,
-            'total_amount': float(total_amount),
-            'successful_payments': successful,
-            'pending_payments': pending,
-            'failed_payments': failed,
-            'today_transactions': today_transactions,
-            'today_amount': float(today_amount),            'weekly_trend': [
-                {
-                    'date': str(stat.date),
-                    'count': stat.count,
-                    'amount': float(stat.amount or 0)
-                } for stat in weekly_stats
-            ],
-            'method_breakdown': [
-                {
-                    'method': stat.method,
-                    'count': stat.count,
-                    'amount': float(stat.amount or 0)
-                } for stat in method_stats
-            ]
-        })
+        return conditional_success_response(cached('dashboard:stats', DASHBOARD_CACHE_TTL, _dashboard_stats,
+                                                   refresh=wants_fresh()))
         
     except Exception as e:
         return error_response(f"Failed to get dashboard stats: {str(e)}", 500)
 
+# Worker threads for the overview's counters, which run alongside the recent
+# loans query. Each task opens its own app context, so it gets its own session
+# and pooled connection.
+_overview_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dashboard-overview')
+
+def _overview_totals_stmt(today_start, today_end):
+    """Every overview counter in one statement.
+
+    The /api/stats transaction aggregates plus user and loan counts as
+    scalar subqueries, so the database answers them in one round-trip.
+    """
+    stmt = _stats_totals_stmt(today_start, today_end)
+    stmt += lambda s: s.add_columns(
+        select(func.count(User.id)).scalar_subquery().label('total_users'),
+        select(func.count(Loan.id)).scalar_subquery().label('total_loans'),
+        select(func.count(Loan.id)).where(Loan.status == 'active').scalar_subquery().label('active_loans')
+    )
+    return stmt
+
+def _overview_totals(today_start):
+    """Run the overview counters statement."""
+    return db.session.execute(
+        _overview_totals_stmt(today_start, today_start + timedelta(days=1))
+    ).one()
+
+# Parameterless aggregates are built once at import; executing the same
+# statement object skips rebuilding it and its cache key per request.
+_TRANSACTION_SUMMARY_STMT = select(
+    func.count(Transaction.id).label('total_transactions'),
+    func.coalesce(func.sum(Transaction.amount), 0).label('total_amount'),
+    func.sum(case((Transaction.status.in_(['completed', 'paid']), 1), else_=0)).label('successful')
+)
+
+def _dashboard_overview():
+    """Compute the /api/overview payload."""
+    # Date ranges
+    now = datetime.utcnow()
+    today = now.date()
+
+    # All counters in one statement, run concurrently with the recent loans
+    # query: latency is the slower of the two rather than their sum
+    today_start = datetime.combine(today, datetime.min.time())
+    totals_future = submit_in_app_context(_overview_executor, _overview_totals, today_start)
+
+    # Recent activity: last 5 loans, as a column projection with the customer
+    # name joined in (no ORM objects, no lazy customer load per loan)
+    recent_loans = Loan.projection_query().order_by(Loan.created_at.desc()).limit(5).all()
+
+    totals = totals_future.result()
+
+    return {
+        'total_transactions': totals.total_transactions,
+        'total_amount': float(totals.total_amount),
+        'successful_payments': int(totals.successful or 0),
+        'pending_payments': int(totals.pending or 0),
+        'failed_payments': int(totals.failed or 0),
+        'today_transactions': int(totals.today_transactions or 0),
+        'today_amount': float(totals.today_amount or 0),
+        'total_users': totals.total_users,
+        'total_loans': totals.total_loans,
+        'active_loans': totals.active_loans,
+        'recent_activity': {
+            'loans': [Loan.row_to_dict(row) for row in recent_loans]
+        },
+        # Alerts placeholder
+        'alerts': []
+    }
+
 @dashboard_bp.route('/api/overview')
 @api_admin_required
 @rate_limit(max_requests=30, window=60)
+@concurrency_limit(max_concurrent=3)
 def get_dashboard_overview():
     """
     Get comprehensive dashboard overview with users, loans, transactions and analytics
     Compatible with SQL Server, MySQL, and SQLite
     """
-    from models.loan import Loan
-    from models.user import User, LoginAttempt
-    from models.transaction import Transaction
-    from utils.database import db
-    from sqlalchemy import func, and_
-    from datetime import datetime, timedelta
-    import logging
-
-    logger = logging.getLogger(__name__)
-
     try:
-        # Date ranges
-        now = datetime.utcnow()
-        today = now.date()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-
-        # Transaction stats with SQL Server compatibility
-        total_transactions = Transaction.query.count()
-        total_amount = float(db.session.query(func.sum(Transaction.amount)).scalar() or 0)
-        successful_payments = Transaction.query.filter_by(status='paid').count()
-        pending_payments = Transaction.query.filter(Transaction.status.in_(['pending','sent'])).count()
-        failed_payments = Transaction.query.filter_by(status='cancelled').count()
-        
-        # Use CAST for SQL Server compatibility instead of func.date()
-        today_transactions = Transaction.query.filter(
-            func.cast(Transaction.created_at, db.Date) == today
-        ).count()
-        
-        today_amount = float(db.session.query(func.sum(Transaction.amount)).filter(
-            func.cast(Transaction.created_at, db.Date) == today
-        ).scalar() or 0)
-
-        # User and loan stats
-        total_users = User.query.count()
-        total_loans = Loan.query.count()
-        active_loans = Loan.query.filter_by(status='active').count()
-
-        # Build response
-        data = {
-            'total_transactions': total_transactions,
-            'total_amount': total_amount,
-            'successful_payments': successful_payments,
-            'pending_payments': pending_payments,
-            'failed_payments': failed_payments,
-            'today_transactions': today_transactions,
-            'today_amount': today_amount,
-            'total_users': total_users,
-            'total_loans': total_loans,
-            'active_loans': active_loans
-        }
-        # Recent activity: last 5 loans
-        recent_loans = Loan.query.order_by(Loan.created_at.desc()).limit(5).all()
-        data['recent_activity'] = {
-            'loans': [loan.to_dict() for loan in recent_loans]
-        }
-        # Alerts placeholder
-        data['alerts'] = []
-        return success_response(data)
+        return conditional_success_response(cached('dashboard:overview', DASHBOARD_CACHE_TTL, _dashboard_overview,
+                                                   refresh=wants_fresh()))
     except Exception as e:
         return error_response(f"Failed to get dashboard overview: {str(e)}", 500)
 
+def _transaction_summary():
+    """Overall transaction count, amount and successful count in one query."""
+    totals = db.session.execute(_TRANSACTION_SUMMARY_STMT).one()
+    return {
+        'total_transactions': totals.total_transactions,
+        'total_amount': float(totals.total_amount),
+        'successful_transactions': int(totals.successful or 0)
+    }
+
 @dashboard_bp.route('/api/transactions')
 @api_admin_required
 @rate_limit(max_requests=60, window=60)
+@concurrency_limit(max_concurrent=3)
 def get_dashboard_transactions():
     """
     Get transactions for dashboard with enhanced data structure
@@ -224,21 +304,42 @@ def get_dashboard_transactions():
       - name: search
         in: query
         type: string
+      - name: cursor
+        in: query
+        type: string
+        description: next_cursor from the previous page; switches to keyset pagination (send empty for the first page)
+      - name: view
+        in: query
+        type: string
+        enum: [list, full]
+        default: list
+        description: full includes the Paynow/OTP payloads and free-text fields
+      - name: ids
+        in: query
+        type: string
+        description: Comma-separated transaction ids (max 100) to fetch in request order; other filters are ignored
     responses:
       200:
         description: Paginated transactions with summary
     """
     try:
-        from models.transaction import Transaction
-        from sqlalchemy import desc, func
-        
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         status_filter = request.args.get('status')
         method_filter = request.args.get('method')
         search = request.args.get('search')
         
-        query = Transaction.query
+        # Table columns only unless the full records are asked for
+        if request.args.get('view') == 'full':
+            query, serialize = Transaction.projection_query(), Transaction.row_to_dict
+        else:
+            query, serialize = Transaction.listing_query(), Transaction.listing_row_to_dict
+        
+        # Batch lookup by id, ignoring filters and pagination
+        if 'ids' in request.args:
+            ids = _requested_ids()
+            rows = query.filter(Transaction.id.in_(ids)).all()
+            return _batch_response('transactions', rows, ids, serialize)
         
         # Apply filters
         if status_filter:
@@ -246,43 +347,38 @@ def get_dashboard_transactions():
         if method_filter:
             query = query.filter(Transaction.method == method_filter)
         if search:
-            query = query.filter(
-                Transaction.reference.contains(search) |
-                Transaction.phone_number.contains(search) |
-                (Transaction.paynow_reference.contains(search) if Transaction.paynow_reference else False)
+            query = query.filter(Transaction.search_filter(search))
+        
+        # Transaction summary (unfiltered, so one cache entry serves every page)
+        summary = cached('dashboard:transactions:summary', DASHBOARD_CACHE_TTL, _transaction_summary)
+        
+        # Keyset pagination when a cursor is supplied (no OFFSET walk, no COUNT)
+        if 'cursor' in request.args:
+            rows, next_cursor = keyset_paginate(
+                query, Transaction.created_at, Transaction.id,
+                request.args.get('cursor'), per_page
             )
+            return stream_success_response(map(serialize, rows), 'transactions', {
+                'summary': summary,
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor,
+                    'has_next': next_cursor is not None
+                }
+            })
         
         # Order by latest first
-        query = query.order_by(desc(Transaction.created_at))
-        
-        # Paginate
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
+        # Page rows and total count in one round-trip
+        pagination = offset_paginate(
+            query.order_by(desc(Transaction.created_at)), page, per_page
         )
         
-        # Get transaction summary
-        total_transactions = Transaction.query.count()
-        total_amount = db.session.query(func.sum(Transaction.amount)).scalar() or 0
-        successful_transactions = Transaction.query.filter(
-            Transaction.status.in_(['completed', 'paid'])
-        ).count()
-        
-        # Convert transactions to dict using the model method
-        transactions = []
-        for t in pagination.items:
-            tx_dict = t.to_dict()
-            transactions.append(tx_dict)
-        
-        return success_response({
-            'transactions': transactions,
-            'summary': {
-                'total_transactions': total_transactions,
-                'total_amount': float(total_amount),
-                'successful_transactions': successful_transactions
-            },
+        # Rows come straight from the projection and are encoded as they stream
+        return stream_success_response(map(serialize, pagination.items), 'transactions', {
+            'summary': summary,
             'pagination': {
-                'page': page,
-                'per_page': per_page,
+                'page': pagination.page,
+                'per_page': pagination.per_page,
                 'total': pagination.total,
                 'pages': pagination.pages,
                 'has_next': pagination.has_next,
@@ -290,9 +386,28 @@ def get_dashboard_transactions():
             }
         })
         
+    except ValidationError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f"Failed to get transactions: {str(e)}", 500)
 
+# Seconds a successful database health check is reused by later probes
+HEALTH_CACHE_TTL = 5
+HEALTH_CACHE_KEY = 'health:database'
+
+def _transaction_health_metrics():
+    """Approximate total and last-hour transaction counts.
+
+    The total comes from catalog row counts rather than a COUNT(*) scan;
+    the last-hour count is an index range seek on created_at.
+    """
+    since = datetime.utcnow() - timedelta(hours=1)
+    recent = Transaction.query.filter(Transaction.created_at >= since).count()
+    return {
+        'total_transactions': approximate_row_count(Transaction),
+        'recent_activity': recent
+    }
+
 @dashboard_bp.route('/api/system/health')
 @api_admin_required
 @rate_limit(max_requests=20, window=60)
@@ -310,40 +425,31 @@ def system_health():
         db_status = 'healthy'
         db_error = None
         
-        # Check database connectivity by performing actual operations
+        # Loading the transaction metrics doubles as the connectivity check.
+        # Probes poll this route, so a successful check is reused briefly;
+        # failures are never cached.
+        recent_transactions = total_transactions = 0
         try:
-            # Test 1: Count transactions (tests basic query functionality)
-            total_transactions = Transaction.query.count()
-            
-            # Test 2: Try to access database with SQLAlchemy text()
-            from sqlalchemy import text
-            db.session.execute(text('SELECT 1')).fetchone()
+            metrics = cached(HEALTH_CACHE_KEY, HEALTH_CACHE_TTL, _transaction_health_metrics,
+                             refresh=wants_fresh())
+            recent_transactions = metrics['recent_activity']
+            total_transactions = metrics['total_transactions']
             
         except Exception as e:
+            db.session.rollback()
+            # Make sure the next probe checks the database again
+            invalidate(HEALTH_CACHE_KEY)
             db_status = 'unhealthy'
             db_error = str(e)
             print(f"Database health check failed: {e}")
         
-        # Check recent transaction activity
-        try:
-            recent_transactions = Transaction.query.filter(
-                Transaction.created_at >= datetime.utcnow() - timedelta(hours=1)
-            ).count()
-        except Exception:
-            recent_transactions = 0
-        
-        # Get additional metrics
-        try:
-            total_transactions = Transaction.query.count() if db_status == 'healthy' else 0
-        except Exception:
-            total_transactions = 0
-        
         health_data = {
             'database': db_status,
             'recent_activity': recent_transactions,
             'total_transactions': total_transactions,
             'server_time': datetime.utcnow().isoformat(),
-            'uptime': 'healthy'
+            'uptime': 'healthy',
+            'cache': cache_stats()
         }
         
         # Include error details if database is unhealthy
@@ -356,15 +462,81 @@ def system_health():
         print(f"System health check error: {e}")
         return error_response(f"Failed to get system health: {str(e)}", 500)
 
+def _page_metadata(pagination):
+    """Pagination block for offset-paginated admin listings."""
+    return {
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'has_next': pagination.has_next,
+        'has_prev': pagination.has_prev
+    }
+
+# Most ids accepted by one ``?ids=`` batch lookup
+MAX_BATCH_IDS = 100
+
+def _requested_ids():
+    """Parse ``?ids=1,2,3`` into unique integer ids, in request order.
+
+    Raises:
+        ValidationError: If an id is not an integer or too many are given
+    """
+    ids = {}
+    for part in request.args.get('ids', '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValidationError(f"Invalid id: {part}")
+        ids[int(part)] = None
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValidationError(f"At most {MAX_BATCH_IDS} ids per request")
+    return list(ids)
+
+def _batch_response(list_key, rows, ids, serialize):
+    """Serialize rows fetched with ``id IN (...)`` in the order they were requested."""
+    by_id = {row.id: row for row in rows}
+    return success_response({
+        list_key: [serialize(by_id[row_id]) for row_id in ids if row_id in by_id],
+        'missing_ids': [row_id for row_id in ids if row_id not in by_id]
+    })
+
 # User Management
 @dashboard_bp.route('/api/users', methods=['GET'])
 @api_admin_required
 @rate_limit(max_requests=30, window=60)
+@concurrency_limit(max_concurrent=3)
 def admin_get_users():
-    """Get all users"""
-    from models.user import User
-    users = User.query.order_by(User.created_at.desc()).all()
-    return success_response([u.to_dict() for u in users])
+    """Get all users.
+
+    Pass ``page`` (and optionally ``per_page``, max 100) to fetch one page
+    with pagination metadata; without it every user is returned. ``ids``
+    (comma-separated) fetches just those users in one query.
+    """
+    if 'ids' in request.args:
+        try:
+            ids = _requested_ids()
+        except ValidationError as e:
+            return error_response(str(e), 400)
+        rows = User.listing_query().filter(User.id.in_(ids)).all()
+        return _batch_response('users', rows, ids, User.row_to_dict)
+    
+    # Column projection: no ORM objects, no loans query per customer
+    query = User.listing_query().order_by(User.created_at.desc())
+    
+    if 'page' in request.args:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        pagination = offset_paginate(query, page, per_page)
+        return stream_success_response(map(User.row_to_dict, pagination.items), 'users', {
+            'pagination': _page_metadata(pagination)
+        })
+    
+    # Full list: rows are loaded before the response starts; only the
+    # dicts are built and encoded as the body streams out
+    rows = query.all()
+    return stream_success_response(map(User.row_to_dict, rows))
 
 @dashboard_bp.route('/api/users', methods=['POST'])
 @api_admin_required
@@ -372,33 +544,92 @@ def admin_get_users():
 def admin_create_user():
     """Create a new user"""
     data = request.get_json() or {}
-    from models.user import User
     if not data.get('username') or not data.get('password'):
         return error_response('Username and password are required', 400)
     user = User(
         username=data['username'], email=data.get('email'),
         full_name=data.get('full_name'), phone_number=data.get('phone_number'),
-        role=data.get('role', 'customer'), user_type=data.get('role', 'customer'),
+        role=data.get('role', 'customer'),
         is_active=True
     )
     user.set_password(data['password'])
     db.session.add(user)
     db.session.commit()
+    invalidate_dashboard_cache()
     return success_response(user.to_dict(), 201)
 
+@dashboard_bp.route('/api/users/bulk', methods=['POST'])
+@api_admin_required
+@csrf_required
+def admin_create_users_bulk():
+    """Create several users in one transaction.
+
+    Expects ``{"users": [{"username", "password", ...}, ...]}``. All rows go
+    in with a single multi-row INSERT and one commit; if any row is invalid
+    or conflicts (with an existing user or another row of the batch), none
+    are created. ``role`` must be ``admin`` or ``customer`` (default).
+    """
+    data = request.get_json() or {}
+    users = data.get('users')
+    if not isinstance(users, list) or not users:
+        return error_response('A non-empty users list is required', 400)
+    
+    rows = []
+    usernames, emails = set(), set()
+    for index, item in enumerate(users):
+        if not isinstance(item, dict) or not item.get('username') or not item.get('password'):
+            return error_response(f'User {index}: username and password are required', 400)
+        role = item.get('role', 'customer')
+        if role not in ('admin', 'customer'):
+            return error_response(f'User {index}: role must be admin or customer', 400)
+        if item['username'] in usernames:
+            return error_response(f'User {index}: duplicate username in batch', 400)
+        if item.get('email') and item['email'] in emails:
+            return error_response(f'User {index}: duplicate email in batch', 400)
+        usernames.add(item['username'])
+        if item.get('email'):
+            emails.add(item['email'])
+        rows.append({
+            'username': item['username'], 'email': item.get('email'),
+            'full_name': item.get('full_name'), 'phone_number': item.get('phone_number'),
+            'role': role, 'is_active': True,
+            'password_hash': generate_password_hash(item['password']),
+            'created_at': datetime.utcnow(), 'failed_login_attempts': 0
+        })
+    
+    try:
+        ids = db.session.scalars(insert(User).returning(User.id), rows).all()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return error_response('Username or email already exists', 409)
+    
+    invalidate_dashboard_cache()
+    return success_response({'created': len(ids), 'ids': ids}, status_code=201)
+
 @dashboard_bp.route('/api/users/<int:user_id>', methods=['PUT'])
 @api_admin_required
 @csrf_required
+@rate_limit(max_requests=30, window=60)
 def admin_update_user(user_id):
     """Update user details"""
     data = request.get_json() or {}
-    from models.user import User
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     if not user:
         return error_response('User not found', 404)
-    for field in ['email','full_name','phone_number','role','user_type']:
+    
+    # Username and email uniqueness checked with a single lookup
+    conflict = User.identity_conflict(data.get('username'), data.get('email'), exclude_id=user_id)
+    if conflict:
+        return error_response(f'{conflict.capitalize()} already exists', 400)
+    
+    for field in ['username', 'email', 'full_name', 'phone_number']:
         if field in data:
             setattr(user, field, data[field])
+    if data.get('role') in ('admin', 'customer'):
+        user.role = data['role']
+    if 'is_active' in data:
+        user.is_active = bool(data['is_active'])
     if 'password' in data:
         user.set_password(data['password'])
     db.session.commit()
@@ -408,7 +639,6 @@ def admin_update_user(user_id):
 @api_admin_required
 def admin_toggle_user(user_id):
     """Activate/deactivate a user"""
-    from models.user import User
     user = User.query.get(user_id)
     if not user:
         return error_response('User not found', 404)
@@ -422,7 +652,6 @@ def admin_toggle_user(user_id):
 @rate_limit(max_requests=30, window=60)
 def admin_get_user(user_id):
     """Get a single user's details"""
-    from models.user import User
     user = User.query.get(user_id)
     if not user:
         return error_response('User not found', 404)
@@ -432,17 +661,64 @@ def admin_get_user(user_id):
 @dashboard_bp.route('/api/loans', methods=['GET'])
 @api_admin_required
 @rate_limit(max_requests=30, window=60)
+@concurrency_limit(max_concurrent=3)
 def admin_get_loans():
-    """Get all loans with summary"""
-    from models.loan import Loan
-    loans = Loan.query.order_by(Loan.created_at.desc()).all()
-    data = [l.to_dict() for l in loans]
+    """Get all loans with summary.
+
+    Pass ``page`` (offset) or ``cursor`` (keyset, empty for the first page),
+    with optional ``per_page``, to fetch the loans a page at a time; without
+    either every loan is returned. ``ids`` (comma-separated) fetches just
+    those loans in one query, without the summary.
+    """
+    if 'ids' in request.args:
+        try:
+            ids = _requested_ids()
+        except ValidationError as e:
+            return error_response(str(e), 400)
+        rows = Loan.projection_query().filter(Loan.id.in_(ids)).all()
+        return _batch_response('loans', rows, ids, Loan.row_to_dict)
+    
+    # Summary counted by the database, independent of how many loans are returned
+    counts = dict(db.session.execute(_loan_status_counts_stmt()).all())
     summary = {
-        'total_loans': len(data),
-        'active_loans': len([l for l in data if l['status']=='active']),
-        'completed_loans': len([l for l in data if l['status']=='completed'])
+        'total_loans': sum(counts.values()),
+        'active_loans': counts.get('active', 0),
+        'completed_loans': counts.get('completed', 0)
     }
-    return success_response({'loans': data, 'summary': summary})
+    
+    # Column projection with the customer name joined in (no ORM objects)
+    query = Loan.projection_query()
+    # Same limits for cursor and page mode, as on the other admin listings
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    
+    if 'cursor' in request.args:
+        try:
+            rows, next_cursor = keyset_paginate(
+                query, Loan.created_at, Loan.id, request.args.get('cursor'), per_page
+            )
+        except ValidationError as e:
+            return error_response(str(e), 400)
+        return stream_success_response(map(Loan.row_to_dict, rows), 'loans', {
+            'summary': summary,
+            'pagination': {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            }
+        })
+    
+    if 'page' in request.args:
+        page = request.args.get('page', 1, type=int)
+        pagination = offset_paginate(query.order_by(Loan.created_at.desc()), page, per_page)
+        return stream_success_response(map(Loan.row_to_dict, pagination.items), 'loans', {
+            'summary': summary,
+            'pagination': _page_metadata(pagination)
+        })
+    
+    # Full list: rows are loaded before the response starts; only the
+    # dicts are built and encoded as the body streams out
+    rows = query.order_by(Loan.created_at.desc()).all()
+    return stream_success_response(map(Loan.row_to_dict, rows), 'loans', {'summary': summary})
 
 @dashboard_bp.route('/api/loans', methods=['POST'])
 @api_admin_required
@@ -450,8 +726,6 @@ def admin_get_loans():
 def admin_create_loan():
     """Create a new loan"""
     data = request.get_json() or {}
-    from models.loan import Loan
-    from models.user import User
     # Validate
     user = User.query.get(data.get('user_id'))
     if not user:
@@ -465,6 +739,7 @@ def admin_create_loan():
     )
     db.session.add(loan)
     db.session.commit()
+    invalidate_dashboard_cache()
     return success_response(loan.to_dict(),201)
 
 @dashboard_bp.route('/api/loans/<int:loan_id>', methods=['PUT'])
@@ -473,7 +748,6 @@ def admin_create_loan():
 def admin_update_loan(loan_id):
     """Update loan details"""
     data = request.get_json() or {}
-    from models.loan import Loan
     loan = Loan.query.get(loan_id)
     if not loan:
         return error_response('Loan not found',404)
@@ -481,6 +755,7 @@ def admin_update_loan(loan_id):
         if field in data:
             setattr(loan, field, data[field])
     db.session.commit()
+    invalidate_dashboard_cache()
     return success_response(loan.to_dict())
 
 @dashboard_bp.route('/api/loans/<int:loan_id>', methods=['GET'])
@@ -488,8 +763,8 @@ def admin_update_loan(loan_id):
 @rate_limit(max_requests=30, window=60)
 def admin_get_loan(loan_id):
     """Get a single loan's details"""
-    from models.loan import Loan
-    loan = Loan.query.get(loan_id)
+    # to_dict() reads the customer name: fetch it in the same SELECT
+    loan = db.session.get(Loan, loan_id, options=[joinedload(Loan.customer)])
     if not loan:
         return error_response('Loan not found', 404)
     return success_response(loan.to_dict())
@@ -500,10 +775,11 @@ def admin_get_loan(loan_id):
 @api_admin_required
 @csrf_required
 def admin_process_payment():
-    """Process loan payment"""
-    from models.transaction import Transaction
-    from models.loan import Loan
-    from utils.validators import PaymentValidator
+    """Process loan payment.
+    
+    The transaction is saved as pending and sent to Paynow in the background;
+    poll ``/admin/api/transactions/<id>`` for the outcome.
+    """
     
     try:
         data = request.get_json() or {}
@@ -555,26 +831,17 @@ def admin_process_payment():
             status='pending'
         )
         
-        db.session.add(transaction)
-        db.session.commit()
-        
-        # For OMari payments, create with OTP URLs
+        # For OMari payments, create with OTP URLs (the reference is assigned
+        # on construction, so this goes out with the INSERT)
         if method == 'omari':
             transaction.remoteotpurl = f'https://mock-omari-otp.com/pay/{transaction.reference}'
             transaction.otpreference = f'OTP_{transaction.reference}'
-            db.session.commit()
         
-        # Process payment asynchronously if service is available
-        if payment_service:
-            try:
-                payment_result = payment_service.process_transaction(transaction.reference)
-                # If OMari and processing returns OTP data, use it
-                if method == 'omari' and payment_result and payment_result.get('remoteotpurl'):
-                    transaction.remoteotpurl = payment_result.get('remoteotpurl')
-                    transaction.otpreference = payment_result.get('otpreference')
-                    db.session.commit()
-            except Exception as e:
-                print(f"Payment processing failed: {e}")
+        db.session.add(transaction)
+        # The values were just written; keep them for the response
+        with no_expire_on_commit(db.session):
+            db.session.commit()
+        invalidate_dashboard_cache()
         
         response_data = {
             'message': 'Payment initiated successfully',
@@ -589,6 +856,9 @@ def admin_process_payment():
             response_data['remoteotpurl'] = transaction.remoteotpurl
             response_data['otpreference'] = transaction.otpreference
         
+        # Paynow round-trip happens off the request thread; it updates the
+        # status (and any OMari OTP fields) when it answers
+        payment_dispatcher.dispatch(transaction.reference)
         return success_response(response_data, 201)
         
     except Exception as e:
@@ -658,88 +928,16 @@ def submit_otp():
 
 # Individual Resource Endpoints
 
-@dashboard_bp.route('/api/users/<int:user_id>')
-@api_admin_required
-@rate_limit(max_requests=100, window=60)
-def get_user_details(user_id):
-    """Get individual user details."""
-    from models.user import User
-    try:
-        user = User.query.get(user_id)
-        if not user:
-            return error_response('User not found', 404)
-        
-        return success_response({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'full_name': user.full_name,
-            'phone_number': user.phone_number,
-            'role': user.role,
-            'is_active': user.is_active,
-            'created_at': user.created_at.isoformat() if user.created_at else None,
-            'updated_at': user.updated_at.isoformat() if user.updated_at else None
-        })
-    except Exception as e:
-        return error_response(f"Failed to get user details: {str(e)}", 500)
-
-@dashboard_bp.route('/api/users/<int:user_id>', methods=['PUT'])
-@api_admin_required
-@rate_limit(max_requests=30, window=60)
-def update_user(user_id):
-    """Update user details."""
-    from models.user import User
-    try:
-        user = User.query.get(user_id)
-        if not user:
-            return error_response('User not found', 404)
-        
-        data = request.get_json() or {}
-        
-        # Update allowed fields
-        if 'username' in data:
-            # Check for duplicate username
-            existing = User.query.filter(User.username == data['username'], User.id != user_id).first()
-            if existing:
-                return error_response('Username already exists', 400)
-            user.username = data['username']
-        
-        if 'email' in data:
-            # Check for duplicate email
-            existing = User.query.filter(User.email == data['email'], User.id != user_id).first()
-            if existing:
-                return error_response('Email already exists', 400)
-            user.email = data['email']
-        
-        if 'full_name' in data:
-            user.full_name = data['full_name']
-        
-        if 'phone_number' in data:
-            user.phone_number = data['phone_number']
-        
-        if 'role' in data and data['role'] in ['admin', 'customer']:
-            user.role = data['role']
-        
-        if 'is_active' in data:
-            user.is_active = bool(data['is_active'])
-        
-        user.updated_at = datetime.utcnow()
-        db.session.commit()
-        
-        return success_response({'message': 'User updated successfully'})
-    except Exception as e:
-        db.session.rollback()
-        return error_response(f"Failed to update user: {str(e)}", 500)
-
 @dashboard_bp.route('/api/loans/<int:loan_id>')
 @api_admin_required
 @rate_limit(max_requests=100, window=60)
 def get_loan_details(loan_id):
     """Get individual loan details."""
-    from models.loan import Loan
-    from models.user import User
     try:
-        loan = Loan.query.join(User).filter(Loan.id == loan_id).first()
+        # Populate loan.customer from the join instead of a second SELECT
+        loan = Loan.query.join(User).options(contains_eager(Loan.customer)).filter(
+            Loan.id == loan_id
+        ).first()
         if not loan:
             return error_response('Loan not found', 404)
         
@@ -747,7 +945,7 @@ def get_loan_details(loan_id):
             'id': loan.id,
             'loan_id': loan.loan_id,
             'user_id': loan.user_id,
-            'customer_name': loan.user.full_name or loan.user.username,
+            'customer_name': loan.customer.full_name or loan.customer.username,
             'original_amount': float(loan.original_amount),
             'outstanding_balance': float(loan.outstanding_balance),
             'interest_rate': float(loan.interest_rate),
@@ -765,7 +963,6 @@ def get_loan_details(loan_id):
 @rate_limit(max_requests=30, window=60)
 def update_loan(loan_id):
     """Update loan details."""
-    from models.loan import Loan
     try:
         loan = Loan.query.get(loan_id)
         if not loan:
@@ -802,7 +999,6 @@ def update_loan(loan_id):
 @rate_limit(max_requests=100, window=60)
 def get_transaction_details(transaction_id):
     """Get individual transaction details."""
-    from models.transaction import Transaction
     try:
         transaction = Transaction.query.get(transaction_id)
         if not transaction:
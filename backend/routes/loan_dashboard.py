@@ -1,17 +1,31 @@
 """Enhanced dashboard routes with loan management."""
 from flask import Blueprint, render_template, jsonify, request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc, text
+from sqlalchemy import func, desc, text, case, and_, select, lambda_stmt
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload, contains_eager
 from models.transaction import Transaction
 from models.loan import Loan
 from models.user import User, LoginAttempt
-from utils.database import db
-from utils.responses import success_response, error_response
+from utils.database import db, day_of, submit_in_app_context
+from utils.responses import success_response, error_response, stream_success_response
+from utils.cache import cached, invalidate, generation, bump_generation, wants_fresh
 from utils.security import login_required, admin_required, csrf_required, rate_limit, api_admin_required
+from utils.pagination import keyset_paginate, offset_paginate
+from utils.validators import ValidationError
 from services.auth_service import AuthService
 
 enhanced_dashboard_bp = Blueprint('enhanced_dashboard', __name__, url_prefix='/admin/enhanced')
 
+def _num(value):
+    """Aggregate result as a float, 0.0 for NULL (e.g. SUM over no rows)."""
+    return float(value) if value is not None else 0.0
+
+def _pct(part, whole):
+    """``part`` as a percentage of ``whole`` (floored at 1), rounded to 2 places."""
+    return round(part / max(whole, 1) * 100, 2)
+
 @enhanced_dashboard_bp.route('/')
 @login_required
 @admin_required
@@ -20,175 +34,266 @@ def enhanced_dashboard_home():
     csrf_token = AuthService.generate_csrf_token()
     return render_template('dashboard/enhanced.html', csrf_token=csrf_token)
 
+# Seconds the enhanced overview's table-wide figures are reused. They move
+# slowly, so one request per window recomputes them (shared through Redis
+# when configured) instead of every request scanning the three tables.
+OVERVIEW_CACHE_TTL = 120
+OVERVIEW_CACHE_KEY = 'enhanced:overview'
+
+# Worker threads for the overview's independent aggregate queries. Each task
+# opens its own app context, so it gets its own session and pooled connection.
+_overview_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='enhanced-overview')
+
+# The overview statements are lambda_stmt()s or built once at import, so
+# SQLAlchemy reuses their cache keys and compiled SQL and each request only
+# binds the captured dates.
+
+def _user_stats_stmt(month_ago):
+    """User, customer, active customer and new customer counts in one pass."""
+    return lambda_stmt(lambda: select(
+        func.count(User.id),
+        func.sum(case((User.role == 'customer', 1), else_=0)),
+        func.sum(case((and_(User.role == 'customer', User.is_active == True), 1), else_=0)),
+        func.sum(case((and_(User.role == 'customer', User.created_at >= month_ago), 1), else_=0))
+    ))
+
+def _loan_stats_stmt(month_ago):
+    """Loan counts, amounts and this month's disbursements in one pass."""
+    return lambda_stmt(lambda: select(
+        func.count(Loan.id).label('total'),
+        func.sum(case((Loan.status == 'active', 1), else_=0)).label('active'),
+        func.sum(case((Loan.status == 'completed', 1), else_=0)).label('completed'),
+        func.sum(Loan.original_amount).label('total_disbursed'),
+        func.sum(Loan.outstanding_balance).label('total_outstanding'),
+        func.avg(Loan.original_amount).label('avg_amount'),
+        func.sum(case((Loan.created_at >= month_ago, 1), else_=0)).label('month_count'),
+        func.sum(case((Loan.created_at >= month_ago, Loan.original_amount))).label('month_amount')
+    ))
+
+def _transaction_stats_stmt(today_start, tomorrow_start):
+    """Transaction counts, amounts and today's figures in one pass."""
+    return lambda_stmt(lambda: select(
+        func.count(Transaction.id).label('total'),
+        func.sum(case((Transaction.status.in_(['completed', 'paid']), 1), else_=0)).label('completed'),
+        func.sum(case((Transaction.status == 'pending', 1), else_=0)).label('pending'),
+        func.sum(Transaction.amount).label('total_amount'),
+        func.sum(case((Transaction.status.in_(['completed', 'paid']), Transaction.amount))).label('completed_amount'),
+        func.avg(case((Transaction.status.in_(['completed', 'paid']), Transaction.amount))).label('avg_completed_amount'),
+        func.sum(case((and_(
+            Transaction.created_at >= today_start, Transaction.created_at < tomorrow_start
+        ), 1), else_=0)).label('today_count'),
+        func.sum(case((and_(
+            Transaction.created_at >= today_start, Transaction.created_at < tomorrow_start,
+            Transaction.status.in_(['completed', 'paid'])
+        ), Transaction.amount))).label('today_completed_amount')
+    ))
+
+_PAYMENT_METHODS_STMT = select(
+    Transaction.method,
+    func.count(Transaction.id).label('count'),
+    func.sum(Transaction.amount).label('total_amount')
+).where(
+    Transaction.status.in_(['completed', 'paid'])
+).group_by(Transaction.method)
+
+def _overview_user_stats(month_ago):
+    """Run the user counters statement."""
+    return db.session.execute(_user_stats_stmt(month_ago)).one()
+
+def _overview_loan_stats(month_ago):
+    """Run the loan counters statement."""
+    return db.session.execute(_loan_stats_stmt(month_ago)).one()
+
+def _overview_payment_methods():
+    """Completed payment count and amount per method."""
+    return db.session.execute(_PAYMENT_METHODS_STMT).all()
+
+def _overview_aggregates():
+    """Compute the overview's summary, financial, growth and performance figures.
+
+    The user, loan and payment method queries run on worker threads while
+    the transaction query runs here, so latency is the slowest query rather
+    than their sum.
+
+    Returns:
+        dict: Overview sections plus ``computed_at``, the time they were computed
+    """
+    # Get date ranges
+    now = datetime.utcnow()
+    today_start = datetime.combine(now.date(), datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+    month_ago = now - timedelta(days=30)
+    
+    user_future = submit_in_app_context(_overview_executor, _overview_user_stats, month_ago)
+    loan_future = submit_in_app_context(_overview_executor, _overview_loan_stats, month_ago)
+    methods_future = submit_in_app_context(_overview_executor, _overview_payment_methods)
+    
+    # === TRANSACTION STATISTICS ===
+    # One pass: conditional aggregates replace per-filter COUNTs; today's
+    # counters use a half-open range on created_at
+    tx_stats = db.session.execute(_transaction_stats_stmt(today_start, tomorrow_start)).one()
+    total_transactions = tx_stats.total or 0
+    completed_transactions = int(tx_stats.completed or 0)
+    pending_transactions = int(tx_stats.pending or 0)
+    
+    total_transaction_amount = _num(tx_stats.total_amount)
+    total_completed_amount = _num(tx_stats.completed_amount)
+    
+    transactions_today = int(tx_stats.today_count or 0)
+    amount_collected_today = tx_stats.today_completed_amount or 0
+    
+    # Success rate
+    success_rate = _pct(completed_transactions, total_transactions)
+    
+    # === USER STATISTICS ===
+    user_stats = user_future.result()
+    total_users = user_stats[0] or 0
+    total_customers = int(user_stats[1] or 0)
+    active_customers = int(user_stats[2] or 0)
+    new_customers_this_month = int(user_stats[3] or 0)
+    
+    # === LOAN STATISTICS ===
+    loan_stats = loan_future.result()
+    total_loans = loan_stats.total or 0
+    active_loans = int(loan_stats.active or 0)
+    completed_loans = int(loan_stats.completed or 0)
+    
+    total_disbursed = _num(loan_stats.total_disbursed)
+    total_outstanding = _num(loan_stats.total_outstanding)
+    total_collected = total_disbursed - total_outstanding
+    
+    # Collection rate
+    collection_rate = _pct(total_collected, total_disbursed)
+    
+    # Loans this month
+    loans_this_month = (loan_stats.month_count, loan_stats.month_amount)
+    
+    # === PAYMENT METHOD BREAKDOWN ===
+    payment_methods = methods_future.result()
+    
+    # === PERFORMANCE METRICS ===
+    avg_loan_amount = loan_stats.avg_amount or 0
+    avg_payment_amount = tx_stats.avg_completed_amount or 0
+    
+    return {
+        'summary': {
+            'total_users': total_users,
+            'total_customers': total_customers,
+            'active_customers': active_customers,
+            'total_loans': total_loans,
+            'active_loans': active_loans,
+            'total_transactions': total_transactions,
+            'pending_transactions': pending_transactions
+        },
+        
+        'financial': {
+            'total_disbursed': total_disbursed,
+            'total_outstanding': total_outstanding,
+            'total_collected': total_collected,
+            'collection_rate': collection_rate,
+            'total_transaction_amount': total_transaction_amount,
+            'total_completed_amount': total_completed_amount,
+            'amount_collected_today': float(amount_collected_today),
+            'avg_loan_amount': round(float(avg_loan_amount), 2),
+            'avg_payment_amount': round(float(avg_payment_amount), 2)
+        },
+        
+        'growth': {
+            'new_customers_this_month': new_customers_this_month,
+            'loans_this_month_count': loans_this_month[0] or 0,
+            'loans_this_month_amount': _num(loans_this_month[1]),
+            'transactions_today': transactions_today,
+            'customer_growth_rate': _pct(new_customers_this_month, total_customers - new_customers_this_month)
+        },
+        
+        'performance': {
+            'success_rate': success_rate,
+            'completed_loans': completed_loans,
+            'completion_rate': _pct(completed_loans, total_loans)
+        },
+        
+        'payment_methods': [
+            {
+                'method': method,
+                'count': count,
+                'total_amount': float(total_amount),
+                'percentage': _pct(count, completed_transactions)
+            }
+            for method, count, total_amount in payment_methods
+        ],
+        
+        'computed_at': now.isoformat()
+    }
+
+def _recent_loans():
+    """Last 5 loans with their customer's name, serialized."""
+    recent_loans = Loan.query.options(joinedload(Loan.customer)).order_by(
+        Loan.created_at.desc()
+    ).limit(5).all()
+    return [
+        {
+            **loan.to_dict(),
+            'customer_name': loan.customer.full_name if loan.customer else 'Unknown'
+        }
+        for loan in recent_loans
+    ]
+
+def _recent_logins():
+    """Last 5 successful logins, serialized."""
+    recent_logins = LoginAttempt.query.filter_by(success=True).order_by(
+        LoginAttempt.created_at.desc()
+    ).limit(5).all()
+    return [login.to_dict() for login in recent_logins]
+
 @enhanced_dashboard_bp.route('/api/overview')
 @api_admin_required
 @rate_limit(max_requests=30, window=60)
 def get_enhanced_overview():
     """Get comprehensive dashboard overview with loan management."""
     try:
-        # Get date ranges
-        now = datetime.utcnow()
-        today = now.date()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        
-        # === USER STATISTICS ===
-        total_users = User.query.count()
-        total_customers = User.query.filter_by(role='customer').count()
-        active_customers = User.query.filter_by(role='customer', is_active=True).count()
-        new_customers_this_month = User.query.filter(
-            User.role == 'customer',
-            User.created_at >= month_ago
-        ).count()
-        
-        # === LOAN STATISTICS ===
-        total_loans = Loan.query.count()
-        active_loans = Loan.query.filter_by(status='active').count()
-        completed_loans = Loan.query.filter_by(status='completed').count()
-        
-        # Loan amounts
-        loan_amounts = db.session.query(
-            func.sum(Loan.original_amount).label('total_disbursed'),
-            func.sum(Loan.outstanding_balance).label('total_outstanding')
-        ).first()
-        
-        total_disbursed = float(loan_amounts.total_disbursed or 0)
-        total_outstanding = float(loan_amounts.total_outstanding or 0)
-        total_collected = total_disbursed - total_outstanding
-        
-        # Collection rate
-        collection_rate = (total_collected / max(total_disbursed, 1)) * 100
-        
-        # Loans this month
-        loans_this_month = db.session.query(
-            func.count(Loan.id),
-            func.sum(Loan.original_amount)
-        ).filter(Loan.created_at >= month_ago).first()
-        
-        # === TRANSACTION STATISTICS ===
-        total_transactions = Transaction.query.count()
-        completed_transactions = Transaction.query.filter(
-            Transaction.status.in_(['completed', 'paid'])
-        ).count()
-        pending_transactions = Transaction.query.filter_by(status='pending').count()
-          # Transaction amounts - using separate queries for MySQL compatibility
-        total_transaction_amount = db.session.query(
-            func.sum(Transaction.amount)
-        ).scalar() or 0
-        
-        total_completed_amount = db.session.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.status.in_(['completed', 'paid'])
-        ).scalar() or 0
-        
-        total_transaction_amount = float(total_transaction_amount)
-        total_completed_amount = float(total_completed_amount)
-        
-        # Transactions today
-        transactions_today = Transaction.query.filter(
-            Transaction.created_at >= today
-        ).count()
-        
-        amount_collected_today = db.session.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.created_at >= today,
-            Transaction.status.in_(['completed', 'paid'])
-        ).scalar() or 0
-        
-        # Success rate
-        success_rate = (completed_transactions / max(total_transactions, 1)) * 100
-        
-        # === PAYMENT METHOD BREAKDOWN ===
-        payment_methods = db.session.query(
-            Transaction.method,
-            func.count(Transaction.id).label('count'),
-            func.sum(Transaction.amount).label('total_amount')
-        ).filter(
-            Transaction.status.in_(['completed', 'paid'])
-        ).group_by(Transaction.method).all()
+        overview_data = dict(cached(
+            OVERVIEW_CACHE_KEY, OVERVIEW_CACHE_TTL, _overview_aggregates,
+            refresh=wants_fresh()
+        ))
         
         # === RECENT ACTIVITY ===
-        recent_loans = Loan.query.order_by(Loan.created_at.desc()).limit(5).all()
-        recent_transactions = Transaction.query.order_by(Transaction.created_at.desc()).limit(10).all()
-        recent_logins = LoginAttempt.query.filter_by(success=True).order_by(
-            LoginAttempt.created_at.desc()
-        ).limit(5).all()
-        
-        # === PERFORMANCE METRICS ===
-        avg_loan_amount = db.session.query(func.avg(Loan.original_amount)).scalar() or 0
-        avg_payment_amount = db.session.query(
-            func.avg(Transaction.amount)
-        ).filter(Transaction.status.in_(['completed', 'paid'])).scalar() or 0
-        
-        overview_data = {
-            'summary': {
-                'total_users': total_users,
-                'total_customers': total_customers,
-                'active_customers': active_customers,
-                'total_loans': total_loans,
-                'active_loans': active_loans,
-                'total_transactions': total_transactions,
-                'pending_transactions': pending_transactions
-            },
-            
-            'financial': {
-                'total_disbursed': total_disbursed,
-                'total_outstanding': total_outstanding,
-                'total_collected': total_collected,
-                'collection_rate': round(collection_rate, 2),
-                'total_transaction_amount': total_transaction_amount,
-                'total_completed_amount': total_completed_amount,
-                'amount_collected_today': float(amount_collected_today),
-                'avg_loan_amount': round(float(avg_loan_amount), 2),
-                'avg_payment_amount': round(float(avg_payment_amount), 2)
-            },
-            
-            'growth': {
-                'new_customers_this_month': new_customers_this_month,
-                'loans_this_month_count': loans_this_month[0] or 0,
-                'loans_this_month_amount': float(loans_this_month[1] or 0),
-                'transactions_today': transactions_today,
-                'customer_growth_rate': round((new_customers_this_month / max(total_customers - new_customers_this_month, 1)) * 100, 2)
-            },
-            
-            'performance': {
-                'success_rate': round(success_rate, 2),
-                'completed_loans': completed_loans,
-                'completion_rate': round((completed_loans / max(total_loans, 1)) * 100, 2)
-            },
-            
-            'payment_methods': [
-                {
-                    'method': method,
-                    'count': count,
-                    'total_amount': float(total_amount),
-                    'percentage': round((count / max(completed_transactions, 1)) * 100, 2)
-                }
-                for method, count, total_amount in payment_methods
-            ],
-            
-            'recent_activity': {
-                'loans': [
-                    {
-                        **loan.to_dict(),
-                        'customer_name': loan.customer.full_name if loan.customer else 'Unknown'
-                    }
-                    for loan in recent_loans
-                ],
-                'transactions': [tx.to_dict() for tx in recent_transactions],
-                'logins': [login.to_dict() for login in recent_logins]
-            },
-            
-            'last_updated': now.isoformat()
+        # Kept live: these are short index-ordered reads, the loans and logins
+        # running on worker threads alongside the transactions
+        loans_future = submit_in_app_context(_overview_executor, _recent_loans)
+        logins_future = submit_in_app_context(_overview_executor, _recent_logins)
+        recent_transactions = Transaction.query.options(
+            joinedload(Transaction.loan), joinedload(Transaction.user)
+        ).order_by(Transaction.created_at.desc()).limit(10).all()
+        
+        overview_data['recent_activity'] = {
+            'loans': loans_future.result(),
+            'transactions': [tx.to_dict() for tx in recent_transactions],
+            'logins': logins_future.result()
         }
+        overview_data['last_updated'] = overview_data.pop('computed_at')
         
         return success_response(overview_data)
         
     except Exception as e:
         return error_response(f'Failed to get enhanced overview: {str(e)}', 500)
 
+# Loan columns the management listing may be sorted by; anything else
+# (relationships, properties, methods) falls back to newest first
+_LOAN_SORT_COLUMNS = {
+    'id': Loan.id,
+    'loan_id': Loan.loan_id,
+    'user_id': Loan.user_id,
+    'original_amount': Loan.original_amount,
+    'outstanding_balance': Loan.outstanding_balance,
+    'interest_rate': Loan.interest_rate,
+    'term_months': Loan.term_months,
+    'status': Loan.status,
+    'disbursement_date': Loan.disbursement_date,
+    'created_at': Loan.created_at,
+    'updated_at': Loan.updated_at,
+    'completed_at': Loan.completed_at
+}
+
 @enhanced_dashboard_bp.route('/api/loans')
 @api_admin_required
 @rate_limit(max_requests=20, window=60)
@@ -203,8 +308,11 @@ def get_loans_management():
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
         
-        # Base query with joins for customer data
-        loans_query = db.session.query(Loan).join(User, Loan.user_id == User.id)
+        # Column projection with the customer's contact columns joined in:
+        # rows rather than ORM objects, so no hydration or identity map work
+        loans_query = Loan.projection_query().add_columns(
+            User.username, User.phone_number, User.email
+        )
         
         # Apply filters
         if status_filter:
@@ -216,60 +324,74 @@ def get_loans_management():
                 User.username.ilike(f'%{customer_filter}%')
             )
         
-        # Apply sorting
-        if hasattr(Loan, sort_by):
-            order_col = getattr(Loan, sort_by)
-            if sort_order == 'desc':
-                loans_query = loans_query.order_by(desc(order_col))
-            else:
-                loans_query = loans_query.order_by(order_col)
-        else:
+        # Apply sorting (whitelisted columns only)
+        order_col = _LOAN_SORT_COLUMNS.get(sort_by)
+        if order_col is None:
             loans_query = loans_query.order_by(desc(Loan.created_at))
+        elif sort_order == 'desc':
+            loans_query = loans_query.order_by(desc(order_col))
+        else:
+            loans_query = loans_query.order_by(order_col)
         
         # Paginate
-        loans_paginated = loans_query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        # Build response data
-        loans_data = []
-        for loan in loans_paginated.items:
-            loan_dict = loan.to_dict()
+        loans_paginated = offset_paginate(loans_query, page, per_page)
+        
+        # Payment summaries for the whole page in one grouped query
+        loan_ids = [loan.id for loan in loans_paginated.items]
+        is_paid = Transaction.is_paid_clause()
+        payment_rows = db.session.query(
+            Transaction.loan_id,
+            func.count(Transaction.id).label('total'),
+            func.sum(case((is_paid, 1), else_=0)).label('completed'),
+            func.max(case((is_paid, Transaction.created_at))).label('last_paid')
+        ).filter(Transaction.loan_id.in_(loan_ids)).group_by(Transaction.loan_id).all() if loan_ids else []
+        summary_by_loan = {row.loan_id: row for row in payment_rows}
+        
+        # Response items, built as the list streams out (customer and payment
+        # summary are already loaded, so no query runs per item)
+        def loan_item(row):
+            loan_dict = Loan.row_to_dict(row)
             # Add customer information
             loan_dict['customer'] = {
-                'id': loan.customer.id,
-                'username': loan.customer.username,
-                'full_name': loan.customer.full_name,
-                'phone_number': loan.customer.phone_number,
-                'email': loan.customer.email
+                'id': row.user_id,
+                'username': row.username,
+                'full_name': row.customer_name,
+                'phone_number': row.phone_number,
+                'email': row.email
             }
             
             # Add payment summary
-            loan_transactions = Transaction.query.filter_by(loan_id=loan.id).all()
+            payments = summary_by_loan.get(row.id)
             loan_dict['payment_summary'] = {
-                'total_payments': len(loan_transactions),
-                'completed_payments': len([tx for tx in loan_transactions if tx.paid]),
-                'last_payment_date': max([tx.created_at for tx in loan_transactions if tx.paid], default=None),
-                'next_expected_payment': loan.monthly_payment
+                'total_payments': payments.total if payments else 0,
+                'completed_payments': int(payments.completed or 0) if payments else 0,
+                'last_payment_date': payments.last_paid if payments else None,
+                'next_expected_payment': Loan.calc_monthly_payment(row.original_amount, row.term_months)
             }
             
-            loans_data.append(loan_dict)
+            return loan_dict
         
-        # Get summary statistics
+        # Get summary statistics from one GROUP BY status query
+        status_rows = db.session.query(
+            Loan.status,
+            func.count(Loan.id),
+            func.sum(Loan.original_amount),
+            func.sum(Loan.outstanding_balance)
+        ).group_by(Loan.status).all()
+        status_counts = {status: count for status, count, _, _ in status_rows}
         summary_stats = {
-            'total_loans': Loan.query.count(),
-            'active_loans': Loan.query.filter_by(status='active').count(),
-            'completed_loans': Loan.query.filter_by(status='completed').count(),
-            'defaulted_loans': Loan.query.filter_by(status='defaulted').count(),
-            'total_disbursed': float(db.session.query(func.sum(Loan.original_amount)).scalar() or 0),
-            'total_outstanding': float(db.session.query(func.sum(Loan.outstanding_balance)).scalar() or 0)
+            'total_loans': sum(status_counts.values()),
+            'active_loans': status_counts.get('active', 0),
+            'completed_loans': status_counts.get('completed', 0),
+            'defaulted_loans': status_counts.get('defaulted', 0),
+            'total_disbursed': float(sum(row[2] or 0 for row in status_rows)),
+            'total_outstanding': float(sum(row[3] or 0 for row in status_rows))
         }
         
-        return success_response({
-            'loans': loans_data,
+        return stream_success_response(map(loan_item, loans_paginated.items), 'loans', {
             'pagination': {
-                'page': page,
-                'per_page': per_page,
+                'page': loans_paginated.page,
+                'per_page': loans_paginated.per_page,
                 'total': loans_paginated.total,
                 'pages': loans_paginated.pages,
                 'has_next': loans_paginated.has_next,
@@ -297,53 +419,64 @@ def get_customers_management():
         per_page = min(request.args.get('per_page', 50, type=int), 200)
         search = request.args.get('search', '').strip()
         
-        # Base query for customers
-        customers_query = User.query.filter_by(role='customer')
+        # Base query for customers: column rows with the active-loan totals
+        # joined in, so nothing is loaded while the list streams out
+        customers_query = User.listing_query().filter(User.role == 'customer')
         
         # Apply search filter
         if search:
-            customers_query = customers_query.filter(
-                User.full_name.ilike(f'%{search}%') |
-                User.username.ilike(f'%{search}%') |
-                User.email.ilike(f'%{search}%') |
-                User.phone_number.ilike(f'%{search}%')
-            )
+            customers_query = customers_query.filter(User.search_filter(search))
         
         customers_query = customers_query.order_by(desc(User.created_at))
         
         # Paginate
-        customers_paginated = customers_query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        # Build response data with loan summaries
-        customers_data = []
-        for customer in customers_paginated.items:
-            customer_dict = customer.to_dict()
-            
-            # Add comprehensive loan summary
-            customer_loans = Loan.query.filter_by(user_id=customer.id).all()
-            customer_transactions = Transaction.query.filter_by(user_id=customer.id).all()
+        customers_paginated = offset_paginate(customers_query, page, per_page)
+        
+        # Loan and payment summaries for the whole page, grouped by customer
+        customer_ids = [customer.id for customer in customers_paginated.items]
+        loan_totals = {row.user_id: row for row in db.session.query(
+            Loan.user_id,
+            func.count(Loan.id).label('total_loans'),
+            func.sum(case((Loan.status == 'active', 1), else_=0)).label('active_loans'),
+            func.sum(case((Loan.status == 'completed', 1), else_=0)).label('completed_loans'),
+            func.sum(Loan.original_amount).label('total_borrowed'),
+            func.sum(case((Loan.status == 'active', Loan.outstanding_balance), else_=0)).label('total_outstanding'),
+            func.sum(Loan.original_amount - Loan.outstanding_balance).label('total_paid')
+        ).filter(Loan.user_id.in_(customer_ids)).group_by(Loan.user_id)}
+        
+        is_paid = Transaction.is_paid_clause()
+        payment_totals = {row.user_id: row for row in db.session.query(
+            Transaction.user_id,
+            func.count(Transaction.id).label('payment_history_count'),
+            func.max(case((is_paid, Transaction.created_at))).label('last_payment_date')
+        ).filter(Transaction.user_id.in_(customer_ids)).group_by(Transaction.user_id)}
+        
+        # Response items with loan summaries, built as the list streams out
+        def customer_item(customer):
+            customer_dict = User.row_to_dict(customer)
+            loans = loan_totals.get(customer.id)
+            payments = payment_totals.get(customer.id)
+            total_loans = loans.total_loans if loans else 0
+            total_borrowed = _num(loans.total_borrowed) if loans else 0
             
             customer_dict['loan_summary'] = {
-                'total_loans': len(customer_loans),
-                'active_loans': len([l for l in customer_loans if l.status == 'active']),
-                'completed_loans': len([l for l in customer_loans if l.status == 'completed']),
-                'total_borrowed': sum(float(l.original_amount) for l in customer_loans),
-                'total_outstanding': sum(float(l.outstanding_balance) for l in customer_loans if l.status == 'active'),
-                'total_paid': sum(float(l.original_amount - l.outstanding_balance) for l in customer_loans),
-                'payment_history_count': len(customer_transactions),
-                'last_payment_date': max([tx.created_at for tx in customer_transactions if tx.paid], default=None),
-                'average_loan_amount': sum(float(l.original_amount) for l in customer_loans) / max(len(customer_loans), 1)
+                'total_loans': total_loans,
+                'active_loans': int(loans.active_loans or 0) if loans else 0,
+                'completed_loans': int(loans.completed_loans or 0) if loans else 0,
+                'total_borrowed': total_borrowed,
+                'total_outstanding': _num(loans.total_outstanding) if loans else 0,
+                'total_paid': _num(loans.total_paid) if loans else 0,
+                'payment_history_count': payments.payment_history_count if payments else 0,
+                'last_payment_date': payments.last_payment_date if payments else None,
+                'average_loan_amount': total_borrowed / max(total_loans, 1)
             }
             
-            customers_data.append(customer_dict)
+            return customer_dict
         
-        return success_response({
-            'customers': customers_data,
+        return stream_success_response(map(customer_item, customers_paginated.items), 'customers', {
             'pagination': {
-                'page': page,
-                'per_page': per_page,
+                'page': customers_paginated.page,
+                'per_page': customers_paginated.per_page,
                 'total': customers_paginated.total,
                 'pages': customers_paginated.pages,
                 'has_next': customers_paginated.has_next,
@@ -355,6 +488,132 @@ def get_customers_management():
     except Exception as e:
         return error_response(f'Failed to get customers management data: {str(e)}', 500)
 
+# Seconds a financial report is reused per ``days`` value. Admin writes below
+# bump the reports generation, which moves every worker to fresh cache keys.
+REPORTS_CACHE_TTL = 60
+REPORTS_CACHE_NAMESPACE = 'enhanced:reports:financial'
+MAX_REPORT_DAYS = 365
+
+def _invalidate_enhanced_cache():
+    """Drop the cached overview figures and financial reports after an admin write."""
+    bump_generation(REPORTS_CACHE_NAMESPACE)
+    invalidate(OVERVIEW_CACHE_KEY)
+
+def _financial_report(days):
+    """Build the financial report for the last ``days`` days.
+    
+    Args:
+        days (int): Length of the reporting period
+        
+    Returns:
+        dict: Period, summary, daily breakdown and top customers
+    """
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+    
+    # === PERIOD SUMMARY ===
+    period_loans = db.session.query(
+        func.count(Loan.id),
+        func.sum(Loan.original_amount)
+    ).filter(Loan.created_at >= start_date).first()
+    
+    period_payments = db.session.query(
+        func.count(Transaction.id),
+        func.sum(Transaction.amount)
+    ).filter(
+        Transaction.created_at >= start_date,
+        Transaction.status.in_(['completed', 'paid'])
+    ).first()
+    
+    # === DAILY BREAKDOWN ===
+    # One grouped query per table over the created_at range, bucketed by day
+    range_start = datetime.combine(start_date.date(), datetime.min.time())
+    range_end = datetime.combine(end_date.date(), datetime.min.time()) + timedelta(days=1)
+    
+    loan_day = day_of(Loan.created_at)
+    loans_by_day = {row[0]: row for row in db.session.query(
+        loan_day,
+        func.count(Loan.id),
+        func.sum(Loan.original_amount)
+    ).filter(
+        Loan.created_at >= range_start,
+        Loan.created_at < range_end
+    ).group_by(loan_day)}
+    
+    payment_day = day_of(Transaction.created_at)
+    payments_by_day = {row[0]: row for row in db.session.query(
+        payment_day,
+        func.count(Transaction.id),
+        func.sum(Transaction.amount)
+    ).filter(
+        Transaction.created_at >= range_start,
+        Transaction.created_at < range_end,
+        Transaction.status.in_(['completed', 'paid'])
+    ).group_by(payment_day)}
+    
+    daily_data = []
+    current_date = start_date.date()
+    
+    while current_date <= end_date.date():
+        next_date = current_date + timedelta(days=1)
+        loans_disbursed = loans_by_day.get(current_date, (current_date, 0, None))[1:]
+        payments_collected = payments_by_day.get(current_date, (current_date, 0, None))[1:]
+        disbursed_amount = _num(loans_disbursed[1])
+        collected_amount = _num(payments_collected[1])
+        
+        daily_data.append({
+            'date': current_date.isoformat(),
+            'loans_disbursed_count': loans_disbursed[0] or 0,
+            'loans_disbursed_amount': disbursed_amount,
+            'payments_collected_count': payments_collected[0] or 0,
+            'payments_collected_amount': collected_amount,
+            'net_cash_flow': collected_amount - disbursed_amount
+        })
+        
+        current_date = next_date
+    
+    # === TOP PERFORMERS ===
+    top_customers = db.session.query(
+        User.id,
+        User.username,
+        User.full_name,
+        func.sum(Transaction.amount).label('total_paid')
+    ).join(Transaction).filter(
+        Transaction.created_at >= start_date,
+        Transaction.status.in_(['completed', 'paid'])
+    ).group_by(User.id).order_by(text('total_paid DESC')).limit(10).all()
+    
+    period_disbursed = _num(period_loans[1])
+    period_collected = _num(period_payments[1])
+    
+    financial_report = {
+        'period': {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'days': days
+        },
+        'summary': {
+            'loans_disbursed_count': period_loans[0] or 0,
+            'loans_disbursed_amount': period_disbursed,
+            'payments_collected_count': period_payments[0] or 0,
+            'payments_collected_amount': period_collected,
+            'net_cash_flow': period_collected - period_disbursed,
+            'collection_rate': _pct(period_collected, period_disbursed)
+        },
+        'daily_breakdown': daily_data,
+        'top_customers': [
+            {
+                'id': customer.id,
+                'username': customer.username,
+                'full_name': customer.full_name,
+                'total_paid': float(customer.total_paid)
+            }
+            for customer in top_customers
+        ]
+    }
+    
+    return financial_report
+
 @enhanced_dashboard_bp.route('/api/reports/financial')
 @api_admin_required
 @rate_limit(max_requests=10, window=60)
@@ -362,97 +621,15 @@ def get_financial_reports():
     """Generate comprehensive financial reports."""
     try:
         # Get date range parameters
-        days = request.args.get('days', 30, type=int)
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # === PERIOD SUMMARY ===
-        period_loans = db.session.query(
-            func.count(Loan.id),
-            func.sum(Loan.original_amount)
-        ).filter(Loan.created_at >= start_date).first()
-        
-        period_payments = db.session.query(
-            func.count(Transaction.id),
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.created_at >= start_date,
-            Transaction.status.in_(['completed', 'paid'])
-        ).first()
-        
-        # === DAILY BREAKDOWN ===
-        daily_data = []
-        current_date = start_date.date()
-        
-        while current_date <= end_date.date():
-            next_date = current_date + timedelta(days=1)
-            
-            # Loans disbursed
-            loans_disbursed = db.session.query(
-                func.count(Loan.id),
-                func.sum(Loan.original_amount)
-            ).filter(
-                Loan.created_at >= current_date,
-                Loan.created_at < next_date
-            ).first()
-            
-            # Payments collected
-            payments_collected = db.session.query(
-                func.count(Transaction.id),
-                func.sum(Transaction.amount)
-            ).filter(
-                Transaction.created_at >= current_date,
-                Transaction.created_at < next_date,
-                Transaction.status.in_(['completed', 'paid'])
-            ).first()
-            
-            daily_data.append({
-                'date': current_date.isoformat(),
-                'loans_disbursed_count': loans_disbursed[0] or 0,
-                'loans_disbursed_amount': float(loans_disbursed[1] or 0),
-                'payments_collected_count': payments_collected[0] or 0,
-                'payments_collected_amount': float(payments_collected[1] or 0),
-                'net_cash_flow': float(payments_collected[1] or 0) - float(loans_disbursed[1] or 0)
-            })
-            
-            current_date = next_date
-        
-        # === TOP PERFORMERS ===
-        top_customers = db.session.query(
-            User.id,
-            User.username,
-            User.full_name,
-            func.sum(Transaction.amount).label('total_paid')
-        ).join(Transaction).filter(
-            Transaction.created_at >= start_date,
-            Transaction.status.in_(['completed', 'paid'])
-        ).group_by(User.id).order_by(text('total_paid DESC')).limit(10).all()
-        
-        financial_report = {
-            'period': {
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat(),
-                'days': days
-            },
-            'summary': {
-                'loans_disbursed_count': period_loans[0] or 0,
-                'loans_disbursed_amount': float(period_loans[1] or 0),
-                'payments_collected_count': period_payments[0] or 0,
-                'payments_collected_amount': float(period_payments[1] or 0),
-                'net_cash_flow': float(period_payments[1] or 0) - float(period_loans[1] or 0),
-                'collection_rate': round((float(period_payments[1] or 0) / max(float(period_loans[1] or 0), 1)) * 100, 2)
-            },
-            'daily_breakdown': daily_data,
-            'top_customers': [
-                {
-                    'id': customer.id,
-                    'username': customer.username,
-                    'full_name': customer.full_name,
-                    'total_paid': float(customer.total_paid)
-                }
-                for customer in top_customers
-            ]
-        }
+        # Bounded so the cache holds at most one report per day count
+        days = min(max(request.args.get('days', 30, type=int), 1), MAX_REPORT_DAYS)
+        
+        financial_report = cached(
+            f'{REPORTS_CACHE_NAMESPACE}:{generation(REPORTS_CACHE_NAMESPACE)}:{days}',
+            REPORTS_CACHE_TTL,
+            lambda: _financial_report(days),
+            refresh=wants_fresh()
+        )
         
         return success_response(financial_report)
         
@@ -474,8 +651,8 @@ def get_all_users():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
         
-        # Build query
-        query = User.query
+        # Build query (column rows with the active-loan totals joined in)
+        query = User.listing_query()
         
         # Apply filters
         if role_filter:
@@ -487,41 +664,58 @@ def get_all_users():
             query = query.filter(User.is_active == False)
         
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                User.username.ilike(search_term) |
-                User.full_name.ilike(search_term) |
-                User.email.ilike(search_term) |
-                User.phone_number.ilike(search_term)
-            )
+            query = query.filter(User.search_filter(search))
         
         # Order by creation date
         query = query.order_by(User.created_at.desc())
         
         # Paginate
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        paginated = offset_paginate(query, page, per_page)
+        
+        # Loan and recent transaction counts for the page's customers, grouped by user
+        month_ago = datetime.utcnow() - timedelta(days=30)
+        customer_ids = [user.id for user in paginated.items if user.role == 'customer']
+        loan_totals = {row.user_id: row for row in db.session.query(
+            Loan.user_id,
+            func.count(Loan.id).label('loans_count'),
+            func.sum(case((Loan.status == 'active', 1), else_=0)).label('active_loans_count'),
+            func.sum(Loan.original_amount).label('total_borrowed'),
+            func.sum(case((Loan.status == 'active', Loan.outstanding_balance), else_=0)).label('total_outstanding')
+        ).filter(Loan.user_id.in_(customer_ids)).group_by(Loan.user_id)} if customer_ids else {}
+        recent_counts = dict(db.session.query(
+            Transaction.user_id, func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id.in_(customer_ids),
+            Transaction.created_at >= month_ago
+        ).group_by(Transaction.user_id).all()) if customer_ids else {}
         
-        # Prepare user data with additional statistics
-        users_data = []
-        for user in paginated.items:
-            user_dict = user.to_dict()
+        # Response items with additional statistics, built as the list streams out
+        def user_item(user):
+            user_dict = User.row_to_dict(user)
             
             # Add loan statistics for customers
             if user.role == 'customer':
-                user_dict['loans_count'] = user.loans.count()
-                user_dict['active_loans_count'] = user.loans.filter_by(status='active').count()
-                user_dict['total_borrowed'] = sum(float(loan.original_amount) for loan in user.loans)
-                user_dict['total_outstanding'] = sum(float(loan.outstanding_balance) for loan in user.loans.filter_by(status='active'))
+                loans = loan_totals.get(user.id)
+                user_dict['loans_count'] = loans.loans_count if loans else 0
+                user_dict['active_loans_count'] = int(loans.active_loans_count or 0) if loans else 0
+                user_dict['total_borrowed'] = _num(loans.total_borrowed) if loans else 0
+                user_dict['total_outstanding'] = _num(loans.total_outstanding) if loans else 0
                 
                 # Recent transaction count
-                user_dict['recent_transactions'] = user.transactions.filter(
-                    Transaction.created_at >= datetime.utcnow() - timedelta(days=30)
-                ).count()
+                user_dict['recent_transactions'] = recent_counts.get(user.id, 0)
             
-            users_data.append(user_dict)
-        
-        return success_response({
-            'users': users_data,
+            return user_dict
+        
+        # User summary in one conditional aggregate
+        user_summary = db.session.query(
+            func.count(User.id),
+            func.sum(case((User.role == 'customer', 1), else_=0)),
+            func.sum(case((User.role == 'admin', 1), else_=0)),
+            func.sum(case((User.is_active == True, 1), else_=0)),
+            func.sum(case((User.created_at >= month_ago, 1), else_=0))
+        ).one()
+        
+        return stream_success_response(map(user_item, paginated.items), 'users', {
             'pagination': {
                 'page': paginated.page,
                 'per_page': paginated.per_page,
@@ -529,13 +723,11 @@ def get_all_users():
                 'pages': paginated.pages
             },
             'summary': {
-                'total_users': User.query.count(),
-                'total_customers': User.query.filter_by(role='customer').count(),
-                'total_admins': User.query.filter_by(role='admin').count(),
-                'active_users': User.query.filter_by(is_active=True).count(),
-                'new_users_this_month': User.query.filter(
-                    User.created_at >= datetime.utcnow() - timedelta(days=30)
-                ).count()
+                'total_users': user_summary[0] or 0,
+                'total_customers': int(user_summary[1] or 0),
+                'total_admins': int(user_summary[2] or 0),
+                'active_users': int(user_summary[3] or 0),
+                'new_users_this_month': int(user_summary[4] or 0)
             }
         })
         
@@ -557,12 +749,10 @@ def create_user():
             if not data.get(field):
                 return error_response(f"Missing required field: {field}", 400)
         
-        # Check if username or email already exists
-        if User.query.filter_by(username=data['username']).first():
-            return error_response("Username already exists", 400)
-        
-        if User.query.filter_by(email=data['email']).first():
-            return error_response("Email already exists", 400)
+        # Check if username or email already exists (one round-trip)
+        conflict = User.identity_conflict(data['username'], data['email'])
+        if conflict:
+            return error_response(f"{conflict.capitalize()} already exists", 400)
         
         # Create new user
         user = User(
@@ -571,19 +761,25 @@ def create_user():
             full_name=data['full_name'],
             phone_number=data.get('phone_number'),
             role=data['role'],
-            user_type=data['role'],  # Set same as role
             is_active=data.get('is_active', True)
         )
         
         user.set_password(data['password'])
         
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request claimed the username or email after the check
+            db.session.rollback()
+            conflict = User.identity_conflict(data['username'], data['email']) or 'username'
+            return error_response(f"{conflict.capitalize()} already exists", 400)
+        _invalidate_enhanced_cache()
         
         return success_response({
             'message': 'User created successfully',
             'user': user.to_dict()
-        }, 201)
+        }, status_code=201)
         
     except Exception as e:
         db.session.rollback()
@@ -610,6 +806,7 @@ def update_user(user_id):
             user.set_password(data['password'])
         
         db.session.commit()
+        _invalidate_enhanced_cache()
         
         return success_response({
             'message': 'User updated successfully',
@@ -635,6 +832,7 @@ def toggle_user_status(user_id):
         
         user.is_active = not user.is_active
         db.session.commit()
+        _invalidate_enhanced_cache()
         
         return success_response({
             'message': f"User {'activated' if user.is_active else 'deactivated'} successfully",
@@ -656,25 +854,42 @@ def get_user_details(user_id):
         
         # Add detailed statistics
         if user.role == 'customer':
-            # Loan statistics
-            loans = user.loans.all()
+            # Loan statistics, aggregated in SQL; only the recent 5 loans are loaded
+            loan_stats = db.session.query(
+                func.count(Loan.id),
+                func.sum(case((Loan.status == 'active', 1), else_=0)),
+                func.sum(case((Loan.status == 'completed', 1), else_=0)),
+                func.sum(Loan.original_amount),
+                func.sum(case((Loan.status == 'active', Loan.outstanding_balance), else_=0)),
+                func.sum(Loan.original_amount - Loan.outstanding_balance)
+            ).filter(Loan.user_id == user.id).one()
+            recent_loans = user.loans.options(joinedload(Loan.customer)).order_by(
+                Loan.id.desc()
+            ).limit(5).all()
             user_data['loan_details'] = {
-                'total_loans': len(loans),
-                'active_loans': len([l for l in loans if l.status == 'active']),
-                'completed_loans': len([l for l in loans if l.status == 'completed']),
-                'total_borrowed': sum(float(l.original_amount) for l in loans),
-                'total_outstanding': sum(float(l.outstanding_balance) for l in loans if l.status == 'active'),
-                'total_paid': sum(float(l.paid_amount) for l in loans),
-                'loans': [loan.to_dict() for loan in loans[-5:]]  # Recent 5 loans
+                'total_loans': loan_stats[0] or 0,
+                'active_loans': int(loan_stats[1] or 0),
+                'completed_loans': int(loan_stats[2] or 0),
+                'total_borrowed': _num(loan_stats[3]),
+                'total_outstanding': _num(loan_stats[4]),
+                'total_paid': _num(loan_stats[5]),
+                'loans': [loan.to_dict() for loan in reversed(recent_loans)]  # Recent 5 loans
             }
             
-            # Transaction statistics
-            transactions = user.transactions.all()
+            # Transaction statistics; only the recent 10 transactions are loaded
+            tx_stats = db.session.query(
+                func.count(Transaction.id),
+                func.sum(case((Transaction.status == 'completed', 1), else_=0)),
+                func.sum(Transaction.amount)
+            ).filter(Transaction.user_id == user.id).one()
+            recent_transactions = user.transactions.options(
+                joinedload(Transaction.loan), joinedload(Transaction.user)
+            ).order_by(Transaction.id.desc()).limit(10).all()
             user_data['transaction_details'] = {
-                'total_transactions': len(transactions),
-                'successful_transactions': len([t for t in transactions if t.status == 'completed']),
-                'total_transaction_amount': sum(float(t.amount) for t in transactions),
-                'recent_transactions': [tx.to_dict() for tx in transactions[-10:]]  # Recent 10 transactions
+                'total_transactions': tx_stats[0] or 0,
+                'successful_transactions': int(tx_stats[1] or 0),
+                'total_transaction_amount': _num(tx_stats[2]),
+                'recent_transactions': [tx.to_dict() for tx in reversed(recent_transactions)]  # Recent 10 transactions
             }
         
         # Login history
@@ -705,8 +920,8 @@ def get_all_loans():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
         
-        # Build query
-        query = Loan.query.join(User).add_columns(User.full_name.label('customer_name'))
+        # Build query (loan.customer is populated from the join)
+        query = Loan.query.join(User).options(contains_eager(Loan.customer))
         
         # Apply filters
         if status_filter:
@@ -737,26 +952,46 @@ def get_all_loans():
         query = query.order_by(Loan.created_at.desc())
         
         # Paginate
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        paginated = offset_paginate(query, page, per_page)
+        
+        # Transaction counts and last completed payments for the whole page,
+        # one query each instead of two per loan
+        loan_ids = [loan.id for loan in paginated.items]
+        transaction_counts = {}
+        last_payments = {}
+        if loan_ids:
+            transaction_counts = dict(db.session.query(
+                Transaction.loan_id, func.count(Transaction.id)
+            ).filter(Transaction.loan_id.in_(loan_ids)).group_by(Transaction.loan_id).all())
+            
+            ranked = db.session.query(
+                Transaction.loan_id, Transaction.amount, Transaction.completed_at, Transaction.method,
+                func.row_number().over(
+                    partition_by=Transaction.loan_id,
+                    order_by=(Transaction.completed_at.desc(), Transaction.id.desc())
+                ).label('rn')
+            ).filter(
+                Transaction.loan_id.in_(loan_ids), Transaction.status == 'completed'
+            ).subquery()
+            last_payments = {
+                row.loan_id: row for row in db.session.query(ranked).filter(ranked.c.rn == 1)
+            }
         
         # Prepare loan data
         loans_data = []
-        for loan, customer_name in paginated.items:
+        for loan in paginated.items:
             loan_dict = loan.to_dict()
-            loan_dict['customer_name'] = customer_name
+            loan_dict['customer_name'] = loan.customer.full_name
             
             # Add transaction count
-            loan_dict['transaction_count'] = loan.transactions.count()
+            loan_dict['transaction_count'] = transaction_counts.get(loan.id, 0)
             loan_dict['last_payment'] = None
             
-            last_transaction = loan.transactions.filter_by(status='completed').order_by(
-                Transaction.completed_at.desc()
-            ).first()
-            
+            last_transaction = last_payments.get(loan.id)
             if last_transaction:
                 loan_dict['last_payment'] = {
                     'amount': float(last_transaction.amount),
-                    'date': last_transaction.completed_at.isoformat(),
+                    'date': last_transaction.completed_at.isoformat() if last_transaction.completed_at else None,
                     'method': last_transaction.method
                 }
             
@@ -814,6 +1049,7 @@ def create_loan():
         
         db.session.add(loan)
         db.session.commit()
+        _invalidate_enhanced_cache()
         
         return success_response({
             'message': 'Loan created successfully',
@@ -837,9 +1073,12 @@ def get_loan_details(loan_id):
         customer = User.query.get(loan.user_id)
         loan_data['customer'] = customer.to_dict() if customer else None
         
-        # Add transaction history
-        transactions = loan.transactions.order_by(Transaction.created_at.desc()).all()
-        loan_data['transactions'] = [tx.to_dict() for tx in transactions]
+        # Transaction history as column rows with the loan reference and
+        # customer name joined in, loaded before the response starts; only
+        # the dicts are built and encoded as the body streams out
+        transactions = Transaction.projection_query().filter(
+            Transaction.loan_id == loan.id
+        ).order_by(Transaction.created_at.desc()).all()
         
         # Add payment schedule calculation
         if loan.term_months and loan.original_amount:
@@ -855,7 +1094,7 @@ def get_loan_details(loan_id):
             
             loan_data['payment_schedule'] = payment_schedule
         
-        return success_response(loan_data)
+        return stream_success_response(map(Transaction.row_to_dict, transactions), 'transactions', loan_data)
         
     except Exception as e:
         return error_response(f"Failed to retrieve loan details: {str(e)}", 500)
@@ -878,8 +1117,10 @@ def get_all_transactions():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
         
-        # Build query with joins
-        query = Transaction.query.outerjoin(Loan).outerjoin(User)
+        # Build query with joins; to_dict() reads loan and user, so batch-load them
+        query = Transaction.query.outerjoin(Loan).outerjoin(User).options(
+            selectinload(Transaction.loan), selectinload(Transaction.user)
+        )
         
         # Apply filters
         if status_filter:
@@ -897,7 +1138,9 @@ def get_all_transactions():
         if period_filter:
             now = datetime.utcnow()
             if period_filter == 'today':
-                query = query.filter(func.date(Transaction.created_at) == now.date())
+                today_start = datetime.combine(now.date(), datetime.min.time())
+                query = query.filter(Transaction.created_at >= today_start,
+                                     Transaction.created_at < today_start + timedelta(days=1))
             elif period_filter == 'week':
                 week_start = now - timedelta(days=7)
                 query = query.filter(Transaction.created_at >= week_start)
@@ -906,19 +1149,38 @@ def get_all_transactions():
                 query = query.filter(Transaction.created_at >= month_start)
         
         if search:
+            # Transaction columns go through the trigram index when it exists
             search_term = f"%{search}%"
             query = query.filter(
-                Transaction.reference.ilike(search_term) |
-                Transaction.phone_number.ilike(search_term) |
+                Transaction.search_filter(search) |
                 User.full_name.ilike(search_term) |
                 Loan.loan_id.ilike(search_term)
             )
         
+        # Calculate summary statistics
+        summary = Transaction.get_summary_stats()
+        
+        # Keyset pagination when a cursor is supplied (no OFFSET walk, no COUNT)
+        if 'cursor' in request.args:
+            rows, next_cursor = keyset_paginate(
+                query, Transaction.created_at, Transaction.id,
+                request.args.get('cursor'), per_page
+            )
+            return success_response({
+                'transactions': [transaction.to_dict() for transaction in rows],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor,
+                    'has_next': next_cursor is not None
+                },
+                'summary': summary
+            })
+        
         # Order by creation date
         query = query.order_by(Transaction.created_at.desc())
         
         # Paginate
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        paginated = offset_paginate(query, page, per_page)
         
         # Prepare transaction data
         transactions_data = []
@@ -926,9 +1188,6 @@ def get_all_transactions():
             tx_dict = transaction.to_dict()
             transactions_data.append(tx_dict)
         
-        # Calculate summary statistics
-        summary = Transaction.get_summary_stats()
-        
         return success_response({
             'transactions': transactions_data,
             'pagination': {
@@ -940,6 +1199,8 @@ def get_all_transactions():
             'summary': summary
         })
         
+    except ValidationError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f"Failed to retrieve transactions: {str(e)}", 500)
 
@@ -1040,7 +1301,7 @@ def get_comprehensive_analytics():
         payment_methods = {
             'labels': [stat[0] for stat in method_stats],
             'data': [int(stat[1]) for stat in method_stats],
-            'amounts': [float(stat[2] or 0) for stat in method_stats]
+            'amounts': [_num(stat[2]) for stat in method_stats]
         }
         
         # Collection rate by month
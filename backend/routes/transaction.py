@@ -1,12 +1,14 @@
 """Enhanced transaction routes with loan integration."""
 from flask import Blueprint, request
-from utils.responses import APIResponse
+from utils.responses import APIResponse, stream_success_response
 from utils.validators import PaymentValidator, ValidationError
 from services.payment_service import PaymentService
 from models.transaction import Transaction
 from models.loan import Loan
 from models.user import User
 from utils.database import db
+from sqlalchemy import select, func, case, lambda_stmt
+from sqlalchemy.orm import selectinload, raiseload
 
 transaction_bp = Blueprint('transaction', __name__)
 
@@ -166,8 +168,10 @@ def get_transactions():
         status_filter = request.args.get('status')
         limit = min(request.args.get('limit', 50, type=int), 200)
         
-        # Build query
-        query = Transaction.query
+        # Build query (loan and customer are batch-loaded for the loop below)
+        query = Transaction.query.options(
+            selectinload(Transaction.loan), selectinload(Transaction.user), raiseload('*')
+        )
         
         # Apply filters
         if loan_id:
@@ -183,9 +187,8 @@ def get_transactions():
         # Order by most recent and limit
         transactions = query.order_by(Transaction.created_at.desc()).limit(limit).all()
         
-        # Build enhanced response with loan information
-        transactions_data = []
-        for tx in transactions:
+        # Enhanced item with loan information, built as the response streams
+        def enhanced_dict(tx):
             tx_dict = tx.to_dict()
             
             # Add additional loan and customer information
@@ -206,11 +209,11 @@ def get_transactions():
                     'phone_number': tx.user.phone_number
                 }
             
-            transactions_data.append(tx_dict)
+            return tx_dict
         
         # Add summary information
         summary = {
-            'total_transactions': len(transactions_data),
+            'total_transactions': len(transactions),
             'filters_applied': {
                 'loan_id': loan_id,
                 'status': status_filter,
@@ -218,10 +221,9 @@ def get_transactions():
             }
         }
         
-        return APIResponse.success(
-            data=transactions_data,
-            message="Transactions retrieved successfully",
-            summary=summary
+        return stream_success_response(
+            map(enhanced_dict, transactions), 'data', {'summary': summary},
+            message="Transactions retrieved successfully", flat=True
         )
     
     except Exception as e:
@@ -331,6 +333,25 @@ def get_customer_transactions(customer_id):
     except Exception as e:
         return APIResponse.internal_error(f"Failed to get customer transactions: {str(e)}")
 
+def _today_stats_stmt(today_start, today_end):
+    """Transaction count, amount and completed count for one day."""
+    return lambda_stmt(lambda: select(
+        func.count(Transaction.id).label('count'),
+        func.sum(Transaction.amount).label('amount'),
+        func.sum(case((Transaction.status.in_(['completed', 'paid']), 1), else_=0)).label('completed')
+    ).where(
+        Transaction.created_at >= today_start,
+        Transaction.created_at < today_end
+    ))
+
+def _method_stats_stmt():
+    """Transaction count and amount per payment method."""
+    return lambda_stmt(lambda: select(
+        Transaction.method,
+        func.count(Transaction.id).label('count'),
+        func.sum(Transaction.amount).label('total_amount')
+    ).group_by(Transaction.method))
+
 @transaction_bp.route('/stats', methods=['GET'])
 def get_transaction_stats():
     """
@@ -348,28 +369,20 @@ def get_transaction_stats():
         # Add additional breakdown
         from datetime import datetime, timedelta
         
-        # Today's stats
-        today = datetime.utcnow().date()
-        today_stats = Transaction.query.filter(
-            Transaction.created_at >= today
-        )
+        # Today's stats: half-open datetime range on created_at
+        today_start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        today_stats = db.session.execute(
+            _today_stats_stmt(today_start, today_start + timedelta(days=1))
+        ).one()
         
         today_summary = {
-            'transactions_today': today_stats.count(),
-            'amount_today': float(db.session.query(db.func.sum(Transaction.amount)).filter(
-                Transaction.created_at >= today
-            ).scalar() or 0),
-            'completed_today': today_stats.filter(
-                Transaction.status.in_(['completed', 'paid'])
-            ).count()
+            'transactions_today': today_stats.count,
+            'amount_today': float(today_stats.amount or 0),
+            'completed_today': int(today_stats.completed or 0)
         }
         
         # Method breakdown
-        method_stats = db.session.query(
-            Transaction.method,
-            db.func.count(Transaction.id).label('count'),
-            db.func.sum(Transaction.amount).label('total_amount')
-        ).group_by(Transaction.method).all()
+        method_stats = db.session.execute(_method_stats_stmt()).all()
         
         method_breakdown = [
             {
@@ -2,5 +2,11 @@
 from .hash_service import HashService
 from .paynow_service import PaynowService
 from .payment_service import PaymentService
+from .login_attempt_service import LoginAttemptRecorder, login_attempt_recorder
+from .payment_dispatch_service import PaymentDispatcher, payment_dispatcher
 
-__all__ = ['HashService', 'PaynowService', 'PaymentService']
+__all__ = [
+    'HashService', 'PaynowService', 'PaymentService',
+    'LoginAttemptRecorder', 'login_attempt_recorder',
+    'PaymentDispatcher', 'payment_dispatcher'
+]
@@ -4,7 +4,9 @@ from flask_login import login_user, logout_user, current_user
 from datetime import datetime, timedelta
 from models.user import User, LoginAttempt
 from utils.database import db
+from services.login_attempt_service import login_attempt_recorder
 import secrets
+import hmac
 import hashlib
 
 class AuthService:
@@ -41,17 +43,8 @@ class AuthService:
         # Find user
         user = User.query.filter_by(username=username).first()
         
-        # Log attempt
-        attempt = LoginAttempt(
-            username=username,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            success=False
-        )
-        
         if not user or not user.is_active:
-            db.session.add(attempt)
-            db.session.commit()
+            login_attempt_recorder.record(username, ip_address, user_agent, success=False)
             return {
                 'success': False,
                 'message': 'Invalid credentials.',
@@ -60,8 +53,7 @@ class AuthService:
         
         # Check if account is locked
         if user.is_locked():
-            db.session.add(attempt)
-            db.session.commit()
+            login_attempt_recorder.record(username, ip_address, user_agent, success=False)
             return {
                 'success': False,
                 'message': 'Account is temporarily locked. Please try again later.',
@@ -71,8 +63,7 @@ class AuthService:
         # Check password
         if not user.check_password(password):
             user.increment_failed_attempts()
-            db.session.add(attempt)
-            db.session.commit()
+            login_attempt_recorder.record(username, ip_address, user_agent, success=False)
             return {
                 'success': False,
                 'message': 'Invalid credentials.',
@@ -81,9 +72,7 @@ class AuthService:
         
         # Successful login
         user.reset_failed_attempts()
-        attempt.success = True
-        db.session.add(attempt)
-        db.session.commit()
+        login_attempt_recorder.record(username, ip_address, user_agent, success=True)
         
         # Login user
         login_user(user, remember=True)
@@ -97,11 +86,9 @@ class AuthService:
     @staticmethod
     def create_admin_user(username, email, password):
         """Create admin user."""
-        if User.query.filter_by(username=username).first():
-            return {'success': False, 'message': 'Username already exists'}
-        
-        if User.query.filter_by(email=email).first():
-            return {'success': False, 'message': 'Email already exists'}
+        conflict = User.identity_conflict(username, email)
+        if conflict:
+            return {'success': False, 'message': f'{conflict.capitalize()} already exists'}
         
         user = User(username=username, email=email, role='admin')
         user.set_password(password)
@@ -113,7 +100,10 @@ class AuthService:
     
     @staticmethod
     def generate_csrf_token():
-        """Generate CSRF token."""
+        """Get the session's CSRF token, generating it on first use.
+        
+        The token lives in the session, so page renders only read it back.
+        """
         if 'csrf_token' not in session:
             session['csrf_token'] = secrets.token_hex(16)
         return session['csrf_token']
@@ -121,7 +111,8 @@ class AuthService:
     @staticmethod
     def validate_csrf_token(token):
         """Validate CSRF token."""
-        return token and session.get('csrf_token') == token
+        expected = session.get('csrf_token')
+        return bool(token and expected) and hmac.compare_digest(expected.encode(), token.encode())
     
     @staticmethod
     def get_client_ip():
@@ -0,0 +1,103 @@
+"""Background recording of login attempts."""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from models.user import LoginAttempt
+from utils.database import db
+
+class LoginAttemptRecorder:
+    """Buffer login attempts and write them in batches off the request path."""
+
+    def __init__(self, flush_interval=0.1, batch_size=200):
+        """Initialize recorder.
+
+        Args:
+            flush_interval (float): Seconds to wait for more attempts before writing
+            batch_size (int): Maximum attempts written per insert
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self._app = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind recorder to the Flask app used by the writer thread."""
+        self._app = app
+        atexit.register(self.drain)
+
+    def record(self, username, ip_address, user_agent=None, success=False):
+        """Queue a login attempt for writing.
+
+        Without a bound app (scripts, shell) the attempt is written immediately.
+        """
+        attempt = {
+            'username': username,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'success': success,
+            'created_at': datetime.utcnow()
+        }
+
+        if self._app is None:
+            db.session.add(LoginAttempt(**attempt))
+            db.session.commit()
+            return
+
+        self._ensure_worker()
+        self.queue.put(attempt)
+
+    def drain(self):
+        """Write everything still queued (used at shutdown)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _ensure_worker(self):
+        """Start the writer thread lazily so forked workers each get their own."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='login-attempt-writer', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        """Collect attempts for up to ``flush_interval`` and insert them together."""
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+
+    def _write(self, batch):
+        """Insert a batch of attempts in a single commit."""
+        with self._app.app_context():
+            try:
+                db.session.bulk_insert_mappings(LoginAttempt, batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Failed to record {len(batch)} login attempts: {e}")
+
+# Shared recorder, bound to the app in create_app()
+login_attempt_recorder = LoginAttemptRecorder()
@@ -0,0 +1,70 @@
+"""Background dispatch of payment requests to Paynow."""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PaymentDispatcher:
+    """Send committed transactions to Paynow off the request path."""
+
+    def __init__(self, max_workers=4):
+        """Initialize dispatcher.
+
+        Args:
+            max_workers (int): Concurrent Paynow requests per process
+        """
+        self.max_workers = max_workers
+        self._app = None
+        self._payment_service = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, payment_service):
+        """Bind the Flask app and payment service used by the worker threads."""
+        self._app = app
+        self._payment_service = payment_service
+
+    def dispatch(self, reference):
+        """Queue a committed transaction for processing.
+
+        The transaction's status moves from ``pending`` to ``sent`` (or
+        ``failed``) once Paynow answers; clients poll the status endpoint.
+
+        Args:
+            reference (str): Reference of the transaction to send
+
+        Returns:
+            bool: True if the transaction was queued
+        """
+        if self._app is None or self._payment_service is None:
+            print(f"Payment dispatcher not initialized, {reference} left pending")
+            return False
+
+        self._get_executor().submit(self._process, reference)
+        return True
+
+    def _get_executor(self):
+        """Create the thread pool lazily so forked workers each get their own."""
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='payment-dispatch'
+                    )
+                    self._pid = pid
+        return self._executor
+
+    def _process(self, reference):
+        """Send one transaction to Paynow inside an app context."""
+        with self._app.app_context():
+            try:
+                result = self._payment_service.process_transaction(reference)
+                if result.get('status') != 'success':
+                    print(f"Payment dispatch failed for {reference}: {result.get('message')}")
+            except Exception as e:
+                print(f"Payment dispatch error for {reference}: {e}")
+                self._payment_service.mark_failed(reference)
+
+# Shared dispatcher, bound to the app in create_app()
+payment_dispatcher = PaymentDispatcher()
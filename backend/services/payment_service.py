@@ -1,9 +1,11 @@
 """Payment business logic service."""
 import uuid
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from models.transaction import Transaction
 from services.paynow_service import PaynowService
 from utils.database import db
+from utils.cache import invalidate_dashboard_cache
 import os
 class PaymentService:
     """Service class for payment business logic."""
@@ -69,19 +71,21 @@ class PaymentService:
                     'status_code': transaction.status
                 }
             
-            # Process the payment using existing create_payment logic
-            result= self.create_payment(
-                transaction.phone_number,
+            # Send under this transaction's own reference so Paynow callbacks
+            # find it, and update it in a single commit
+            result = self._request_payment(
+                transaction.reference,
                 float(transaction.amount),
+                transaction.phone_number,
                 transaction.method
             )
-            # debug results
             if result.get('status') == 'success':
-                # Update the original transaction with the new processing data
                 transaction.poll_url = result.get('poll_url')
                 transaction.instructions = result.get('instructions')
                 transaction.paynow_reference = result.get('paynow_reference')
                 transaction.redirect_url = result.get('redirect_url', '')
+                transaction.hash = result.get('hash')
+                transaction.has_redirect = result.get('has_redirect', False)
                 
                 # Handle OMari-specific fields
                 if transaction.method == 'omari':
@@ -90,6 +94,7 @@ class PaymentService:
                 
                 transaction.status = 'sent'  # Update status to sent
                 db.session.commit()
+                invalidate_dashboard_cache()
                 
                 return {
                     'status': 'success',
@@ -109,6 +114,7 @@ class PaymentService:
                 # Processing failed
                 transaction.status = 'failed'
                 db.session.commit()
+                invalidate_dashboard_cache()
                 
                 return {
                     'status': 'error',
@@ -120,11 +126,31 @@ class PaymentService:
                 
         except Exception as e:
             db.session.rollback()
+            self.mark_failed(transaction_reference)
             return {
                 'status': 'error',
                 'message': f'Transaction processing failed: {str(e)}',
                 'reference': transaction_reference
             }
+    
+    def mark_failed(self, transaction_reference):
+        """Mark a transaction that never reached Paynow as failed.
+        
+        Only a ``pending`` transaction is changed, so a status Paynow has
+        already reported is never overwritten.
+        
+        Args:
+            transaction_reference (str): The transaction reference
+        """
+        try:
+            Transaction.query.filter_by(
+                reference=transaction_reference, status='pending'
+            ).update({'status': 'failed', 'updated_at': datetime.utcnow()})
+            db.session.commit()
+            invalidate_dashboard_cache()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to mark transaction {transaction_reference} as failed: {e}")
 
     def create_payment(self, phone_number, amount, method):
         """Create a new payment transaction.
@@ -141,70 +167,34 @@ class PaymentService:
         reference = f"LOAN_{uuid.uuid4().hex[:8].upper()}"
         
         try:
-            # Send payment request to Paynow
-            paynow_response = self.paynow_service.create_payment(
-                reference, amount, phone_number, method
-            )
-            print(f"payniw response {paynow_response}")
-            if paynow_response.success:
-                # Get instructions
-                instructions = paynow_response.get_instructions()
-                
+            result = self._request_payment(reference, amount, phone_number, method)
+            
+            if result['status'] == 'success':
                 # Create transaction record
                 transaction = Transaction(
                     reference=reference,
                     phone_number=phone_number,
                     amount=amount,
                     method=method,
-                    poll_url=paynow_response.get_poll_url(),
+                    poll_url=result['poll_url'],
                     status='pending',
-                    instructions=instructions,
-                    paynow_reference=paynow_response.get_paynow_reference(),
-                    hash=paynow_response.get_hash(),
-                    redirect_url=paynow_response.redirect_url or '',
-                    has_redirect=paynow_response.has_redirect(),
+                    instructions=result['instructions'],
+                    paynow_reference=result['paynow_reference'],
+                    hash=result['hash'],
+                    redirect_url=result['redirect_url'],
+                    has_redirect=result['has_redirect'],
                     # OMari-specific fields
-                    remoteotpurl=paynow_response.remoteotpurl if method == 'omari' else None,
-                    otpreference=paynow_response.otpreference if method == 'omari' else None
+                    remoteotpurl=result['remoteotpurl'],
+                    otpreference=result['otpreference']
                 )
                 
                 # Save to database
                 db.session.add(transaction)
                 db.session.commit()
+                invalidate_dashboard_cache()
                 print(f"Transaction {reference} saved to database")
-                
-                # Return response data
-                return {
-                    "status": "success",
-                    "reference": reference,
-                    "poll_url": paynow_response.get_poll_url(),
-                    "instructions": instructions,
-                    "message": "Payment request sent successfully",
-                    "paynow_reference": paynow_response.get_paynow_reference(),
-                    "redirect_url": paynow_response.redirect_url or '',
-                    "has_redirect": paynow_response.has_redirect(),
-                    "hash": paynow_response.get_hash(),
-                    "paynow_status": paynow_response.data.get('status', '') if paynow_response.data else '',
-                    # OMari-specific fields
-                    "remoteotpurl": paynow_response.remoteotpurl if method == 'omari' else None,
-                    "otpreference": paynow_response.otpreference if method == 'omari' else None
-                }
-            else:
-                # Payment failed
-                errors = getattr(paynow_response.response, 'errors', [])
-                if errors:
-                    errors = [str(error) for error in errors]
-                
-                return {
-                    "status": "error",
-                    "message": "Failed to process payment",
-                    "errors": errors,
-                    "debug_info": {
-                        "reference": reference,
-                        "integration_id": self.paynow_service.integration_id,
-                        "credentials_configured": self.paynow_service.integration_id != 'YOUR_INTEGRATION_ID'
-                    }
-                }
+            
+            return result
         
         except Exception as e:
             db.session.rollback()
@@ -213,6 +203,59 @@ class PaymentService:
                 "message": f"Payment creation failed: {str(e)}"
             }
     
+    def _request_payment(self, reference, amount, phone_number, method):
+        """Send a payment request to Paynow without touching the database.
+        
+        Args:
+            reference (str): Transaction reference sent to Paynow
+            amount (float): Payment amount
+            phone_number (str): Customer phone number
+            method (str): Payment method
+        
+        Returns:
+            dict: Paynow response data, with ``status`` 'success' or 'error'
+        """
+        # Send payment request to Paynow
+        paynow_response = self.paynow_service.create_payment(
+            reference, amount, phone_number, method
+        )
+        if paynow_response.success:
+            # Get instructions
+            instructions = paynow_response.get_instructions()
+            
+            # Return response data
+            return {
+                "status": "success",
+                "reference": reference,
+                "poll_url": paynow_response.get_poll_url(),
+                "instructions": instructions,
+                "message": "Payment request sent successfully",
+                "paynow_reference": paynow_response.get_paynow_reference(),
+                "redirect_url": paynow_response.redirect_url or '',
+                "has_redirect": paynow_response.has_redirect(),
+                "hash": paynow_response.get_hash(),
+                "paynow_status": paynow_response.data.get('status', '') if paynow_response.data else '',
+                # OMari-specific fields
+                "remoteotpurl": paynow_response.remoteotpurl if method == 'omari' else None,
+                "otpreference": paynow_response.otpreference if method == 'omari' else None
+            }
+        
+        # Payment failed
+        errors = getattr(paynow_response.response, 'errors', [])
+        if errors:
+            errors = [str(error) for error in errors]
+        
+        return {
+            "status": "error",
+            "message": "Failed to process payment",
+            "errors": errors,
+            "debug_info": {
+                "reference": reference,
+                "integration_id": self.paynow_service.integration_id,
+                "credentials_configured": self.paynow_service.integration_id != 'YOUR_INTEGRATION_ID'
+            }
+        }
+    
     def create_test_payment(self, phone_number, amount, method):
         """Create a test payment transaction.
         
@@ -246,6 +289,7 @@ class PaymentService:
             # Save to database
             db.session.add(transaction)
             db.session.commit()
+            invalidate_dashboard_cache()
             print(f"Test transaction {reference} saved to database")
             
             response_data = {
@@ -287,6 +331,18 @@ class PaymentService:
             if not transaction:
                 return {"error": "Transaction not found"}
             
+            # Not yet sent (or failed before reaching Paynow): nothing to poll
+            if not transaction.poll_url:
+                return {
+                    "reference": reference,
+                    "status": transaction.status,
+                    "paid": transaction.paid,
+                    "amount": transaction.amount,
+                    "method": transaction.method,
+                    "created_at": transaction.created_at.isoformat() if transaction.created_at else None,
+                    "loan_balance_updated": False
+                }
+            
             # Check status with Paynow
             status = self.paynow_service.check_transaction_status(transaction.poll_url)
             
@@ -306,6 +362,7 @@ class PaymentService:
                         loan.outstanding_balance = 0
             
             db.session.commit()
+            invalidate_dashboard_cache()
             
             return {
                 "reference": reference,
@@ -374,6 +431,7 @@ class PaymentService:
                     transaction.poll_url = response_data.get('pollurl')
                 
                 db.session.commit()
+                invalidate_dashboard_cache()
                 print(f"Transaction {reference} updated with OTP response")
                 
                 return {
@@ -418,6 +476,7 @@ class PaymentService:
                             loan.outstanding_balance = 0
                     
                     db.session.commit()
+                    invalidate_dashboard_cache()
                     print(f"Transaction {reference} updated with Paynow result")
                     return True
                 else:
@@ -436,7 +495,13 @@ class PaymentService:
             list: List of transaction dictionaries
         """
         try:
-            transactions = Transaction.query.order_by(Transaction.created_at.desc()).all()
+            # Loan and customer batch-loaded with one extra SELECT each. Not
+            # yield_per: pyodbc has no server-side cursors, so the selectin
+            # loads would run while the main result is still pending on the
+            # same connection ("Connection is busy" without MARS).
+            transactions = Transaction.query.options(
+                selectinload(Transaction.loan), selectinload(Transaction.user)
+            ).order_by(Transaction.created_at.desc()).all()
             return [transaction.to_dict() for transaction in transactions]
         
         except Exception as e:
@@ -52,7 +52,6 @@ def check_and_update_schema():
                             ('full_name', 'VARCHAR(100)'),
                             ('phone_number', 'VARCHAR(15)'),
                             ('role', 'VARCHAR(20) DEFAULT "admin"'),
-                            ('user_type', 'VARCHAR(20) DEFAULT "admin"'),
                             ('is_active', 'BOOLEAN DEFAULT 1'),
                             ('last_login', 'DATETIME'),
                             ('failed_login_attempts', 'INTEGER DEFAULT 0'),
@@ -69,7 +68,6 @@ def check_and_update_schema():
                         
                         # Update existing users to have default role
                         conn.execute("UPDATE mg_users SET role = 'admin' WHERE role IS NULL")
-                        conn.execute("UPDATE mg_users SET user_type = 'admin' WHERE user_type IS NULL")
                         conn.execute("UPDATE mg_users SET is_active = 1 WHERE is_active IS NULL")
                         conn.execute("UPDATE mg_users SET failed_login_attempts = 0 WHERE failed_login_attempts IS NULL")
                         print("  ✓ Updated existing mg_users with default values")
@@ -89,7 +87,6 @@ def check_and_update_schema():
                             ('full_name', 'VARCHAR(100)'),
                             ('phone_number', 'VARCHAR(15)'),
                             ('role', 'VARCHAR(20) DEFAULT "admin"'),
-                            ('user_type', 'VARCHAR(20) DEFAULT "admin"'),
                             ('is_active', 'BOOLEAN DEFAULT 1'),
                             ('last_login', 'DATETIME'),
                             ('failed_login_attempts', 'INTEGER DEFAULT 0'),
@@ -151,7 +148,6 @@ def check_and_update_schema():
                     email='admin@example.com',
                     full_name='System Administrator',
                     role='admin',
-                    user_type='admin',
                     is_active=True
                 )
                 admin.set_password('admin123')
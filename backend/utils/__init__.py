@@ -1,10 +1,10 @@
 """Utils package initialization."""
-from .database import db, init_db, reset_db
+from .database import db, init_db, reset_db, no_expire_on_commit
 from .validators import PaymentValidator, ValidationError, validate_json_data
-from .responses import APIResponse
+from .responses import APIResponse, init_json
 
 __all__ = [
-    'db', 'init_db', 'reset_db',
+    'db', 'init_db', 'reset_db', 'no_expire_on_commit',
     'PaymentValidator', 'ValidationError', 'validate_json_data',
-    'APIResponse'
+    'APIResponse', 'init_json'
 ]
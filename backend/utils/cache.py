@@ -0,0 +1,175 @@
+"""Short-lived caching of computed values."""
+import json
+import time
+import threading
+from flask import request
+from utils.redis_client import get_redis
+
+# Per-process fallback when Redis is not configured: key -> (expires_at, value).
+# Once LOCAL_CACHE_MAX_ENTRIES is reached, expired entries are purged and,
+# if it is still full, the oldest entries are evicted.
+LOCAL_CACHE_MAX_ENTRIES = 256
+_local_cache = {}
+_local_lock = threading.Lock()
+
+# Per-process fallback for generation counters: namespace -> int
+_local_generations = {}
+
+# Hit/miss counts for this process, reported by the admin health endpoint
+_stats = {'hits': 0, 'misses': 0}
+
+def cached(key, ttl, loader, refresh=False):
+    """Return a cached value, computing and storing it on a miss.
+
+    Values are shared through Redis when ``REDIS_URL`` is set, otherwise
+    kept per process. Cached values must be JSON serializable.
+
+    Args:
+        key (str): Cache key
+        ttl (int): Seconds to keep the value
+        loader (callable): Computes the value on a miss
+        refresh (bool): Recompute and store even if a cached value exists
+
+    Returns:
+        The cached or freshly computed value
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            raw = None if refresh else client.get(f"cache:{key}")
+        except Exception as e:
+            print(f"Redis cache unavailable, using local cache: {e}")
+        else:
+            if raw is not None:
+                _stats['hits'] += 1
+                return json.loads(raw)
+            _stats['misses'] += 1
+            value = loader()
+            try:
+                client.setex(f"cache:{key}", ttl, json.dumps(value))
+            except Exception as e:
+                print(f"Failed to store {key} in Redis cache: {e}")
+            return value
+
+    now = time.monotonic()
+    entry = None if refresh else _local_cache.get(key)
+    if entry is not None and entry[0] > now:
+        _stats['hits'] += 1
+        return entry[1]
+
+    _stats['misses'] += 1
+    value = loader()
+    _store_local(key, now + ttl, value)
+    return value
+
+def _store_local(key, expires_at, value):
+    """Store a value in the per-process cache, keeping it bounded.
+
+    Args:
+        key (str): Cache key
+        expires_at (float): ``time.monotonic()`` deadline
+        value: Value to store
+    """
+    with _local_lock:
+        # Re-inserting moves the key to the end, so iteration order is oldest first
+        _local_cache.pop(key, None)
+        if len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            for stale in [k for k, (deadline, _) in _local_cache.items() if deadline <= now]:
+                del _local_cache[stale]
+            while len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+                del _local_cache[next(iter(_local_cache))]
+        _local_cache[key] = (expires_at, value)
+
+def wants_fresh():
+    """Whether the caller asked (``?fresh=1``) to bypass cached figures.
+
+    Returns:
+        bool: Value to pass as ``cached(..., refresh=...)``
+    """
+    return request.args.get('fresh') in ('1', 'true')
+
+def invalidate(*keys):
+    """Drop cached values so the next ``cached()`` call recomputes them.
+
+    Only this process's local entries can be dropped when Redis is not
+    configured; other workers keep theirs until the TTL expires.
+
+    Args:
+        *keys (str): Cache keys to drop
+    """
+    with _local_lock:
+        for key in keys:
+            _local_cache.pop(key, None)
+
+    client = get_redis()
+    if client is not None and keys:
+        try:
+            client.delete(*(f"cache:{key}" for key in keys))
+        except Exception as e:
+            print(f"Failed to invalidate Redis cache keys {keys}: {e}")
+
+# Admin dashboard figures computed from the transactions table. Every path
+# that writes a Transaction drops them via invalidate_dashboard_cache().
+DASHBOARD_CACHE_KEYS = ('dashboard:stats', 'dashboard:overview', 'dashboard:transactions:summary')
+
+def invalidate_dashboard_cache():
+    """Drop cached dashboard figures after a transaction, loan or user write."""
+    invalidate(*DASHBOARD_CACHE_KEYS)
+
+def generation(namespace):
+    """Current generation of a family of cache keys.
+
+    Build keys as ``f"{namespace}:{generation(namespace)}:..."`` when they
+    cannot be listed for ``invalidate()``, e.g. keys that embed request
+    arguments. ``bump_generation()`` then moves every worker to new keys.
+
+    Args:
+        namespace (str): Key prefix shared by the family
+
+    Returns:
+        int: Generation counter, shared through Redis when configured
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            return int(client.get(f"cache:gen:{namespace}") or 0)
+        except Exception as e:
+            print(f"Redis cache unavailable, using local generation: {e}")
+    return _local_generations.get(namespace, 0)
+
+def bump_generation(namespace):
+    """Retire every cached key built from ``generation(namespace)``.
+
+    Retired Redis keys expire on their own TTL. Retired local keys are
+    dropped here so they do not pile up in this process.
+
+    Args:
+        namespace (str): Key prefix shared by the family
+    """
+    prefix = f"{namespace}:"
+    with _local_lock:
+        _local_generations[namespace] = _local_generations.get(namespace, 0) + 1
+        for key in [key for key in _local_cache if key.startswith(prefix)]:
+            del _local_cache[key]
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.incr(f"cache:gen:{namespace}")
+        except Exception as e:
+            print(f"Failed to bump Redis cache generation {namespace}: {e}")
+
+def cache_stats():
+    """Hit/miss counts of ``cached()`` in this process.
+
+    Returns:
+        dict: hits, misses and hit_rate (percentage, None before any lookup)
+    """
+    hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total * 100, 2) if total else None
+    }
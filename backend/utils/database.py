@@ -1,5 +1,13 @@
 """Database utilities and initialization."""
+from concurrent.futures import Future
+from contextlib import contextmanager
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import scoped_session
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Date
 
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
@@ -23,3 +31,211 @@ def reset_db():
     db.drop_all()
     db.create_all()
     print("Database reset successfully")
+
+class day_of(FunctionElement):
+    """Calendar day of a datetime expression, for grouping by day.
+
+    Compiles to ``CAST(x AS DATE)``, or ``date(x)`` on SQLite where
+    ``CAST AS DATE`` yields a number (and SQL Server has no ``DATE()``).
+    """
+    type = Date()
+    name = 'day_of'
+    inherit_cache = True
+
+@compiles(day_of)
+def _compile_day_of(element, compiler, **kw):
+    return f"CAST({compiler.process(element.clauses, **kw)} AS DATE)"
+
+@compiles(day_of, 'sqlite')
+def _compile_day_of_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+# (engine URL, table name) -> whether that SQLite FTS5 search table exists
+_search_tables = {}
+
+def has_search_index(table):
+    """Check (once per engine) whether an FTS5 trigram search table exists.
+
+    The tables are created by the ``add_*_search_index.py`` scripts, on
+    SQLite only; other databases always report False.
+
+    Args:
+        table (str): Name of the FTS5 virtual table
+
+    Returns:
+        bool: True if searches can use the table
+    """
+    engine = db.engine
+    key = (engine.url, table)
+    if key not in _search_tables:
+        _search_tables[key] = (
+            engine.dialect.name == 'sqlite' and
+            db.inspect(engine).has_table(table)
+        )
+    return _search_tables[key]
+
+def trigram_match(id_column, table, term):
+    """Filter ``id_column`` to the rows whose indexed text contains ``term``.
+
+    Args:
+        id_column: Primary key column of the indexed table
+        table (str): Name of its FTS5 trigram search table
+        term (str): Search text
+
+    Returns:
+        ColumnElement: ``id IN (SELECT rowid ... MATCH ...)`` filter, or None
+            when the index cannot answer the search (it does not exist, or
+            the term is shorter than the 3 characters a trigram needs)
+    """
+    if len(term) < 3 or not has_search_index(table):
+        return None
+    phrase = '"' + term.replace('"', '""') + '"'
+    return id_column.in_(
+        text(f"SELECT rowid FROM {table} WHERE {table} MATCH :phrase").bindparams(phrase=phrase)
+    )
+
+def create_trigram_index(fts_table, content_table, columns):
+    """Create and populate an FTS5 trigram index over text columns of a table.
+
+    Substring search (``LIKE '%term%'``) cannot use a B-tree index. On SQLite
+    (3.34+) this creates an external-content FTS5 table with the trigram
+    tokenizer, keeps it in sync with insert/update/delete triggers, and
+    builds it from the existing rows. ``trigram_match()`` uses it once it
+    exists. Other databases are left on LIKE search. Run inside an app context.
+
+    Args:
+        fts_table (str): Name of the FTS5 table to create
+        content_table (str): Table whose rows are indexed (rowid = its ``id``)
+        columns (list): Text columns of ``content_table`` to index
+
+    Returns:
+        bool: True if the index was created, False if unsupported or present
+    """
+    dialect = db.engine.dialect.name
+    print(f"Database type: {dialect}")
+
+    if dialect != 'sqlite':
+        print("⚠️ No trigram index support for this database, search keeps using LIKE")
+        return False
+
+    if db.inspect(db.engine).has_table(fts_table):
+        print(f"✅ '{fts_table}' already exists")
+        return False
+
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    insert_new = f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+
+    with db.engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                {names}, content='{content_table}', content_rowid='id', tokenize='trigram'
+            )
+        """))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {content_table} BEGIN {insert_new} END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {content_table} BEGIN {delete_old} END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts_table}_au AFTER UPDATE ON {content_table} BEGIN "
+            f"{delete_old} {insert_new} END"
+        ))
+        conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    print(f"✅ Created and populated '{fts_table}'")
+    return True
+
+def approximate_row_count(model):
+    """Row count of a model's table, read from catalog metadata where possible.
+
+    SQL Server keeps per-partition row counts in ``sys.dm_db_partition_stats``,
+    so no table scan is needed. Other databases (SQLite in development) fall
+    back to an exact ``COUNT(*)``.
+
+    Args:
+        model: Mapped model class
+
+    Returns:
+        int: Number of rows (approximate on SQL Server)
+    """
+    if db.engine.dialect.name == 'mssql':
+        try:
+            count = db.session.execute(text(
+                "SELECT SUM(row_count) FROM sys.dm_db_partition_stats "
+                "WHERE object_id = OBJECT_ID(:table) AND index_id IN (0, 1)"
+            ), {'table': model.__tablename__}).scalar()
+            if count is not None:
+                return int(count)
+        except Exception as e:
+            # Reading the DMV needs VIEW DATABASE STATE
+            print(f"Partition stats unavailable for {model.__tablename__}: {e}")
+    return db.session.query(db.func.count()).select_from(model).scalar()
+
+@contextmanager
+def no_expire_on_commit(session):
+    """Keep ORM objects loaded across a commit.
+
+    By default every commit expires all loaded instances, so reading an
+    attribute afterwards issues a fresh SELECT. Inside this block the
+    session keeps its in-memory state, which is safe when the values were
+    just written by this request.
+
+    Args:
+        session: SQLAlchemy session or scoped session (e.g. ``db.session``)
+    """
+    if isinstance(session, scoped_session):
+        session = session()
+    previous = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        yield session
+    finally:
+        session.expire_on_commit = previous
+
+def run_in_app_context(app, loader, *args):
+    """Run ``loader`` inside a fresh app context, typically on a worker thread.
+
+    The new context gets its own scoped session, so the worker checks out a
+    separate pooled connection instead of sharing the request's session.
+
+    Args:
+        app: Flask application (``current_app._get_current_object()``)
+        loader (callable): Function to run
+        *args: Positional arguments for ``loader``
+
+    Returns:
+        Whatever ``loader`` returns
+    """
+    with app.app_context():
+        return loader(*args)
+
+def submit_in_app_context(executor, loader, *args):
+    """Start ``loader`` on ``executor`` in a fresh context of the current app.
+
+    Under ``TESTING`` the loader runs inline on the calling thread instead,
+    so tests see deterministic, serial queries on the request's session.
+
+    Args:
+        executor: ``concurrent.futures`` executor
+        loader (callable): Function to run
+        *args: Positional arguments for ``loader``
+
+    Returns:
+        Future: Resolves to whatever ``loader`` returns
+    """
+    app = current_app._get_current_object()
+    if not app.config.get('TESTING'):
+        return executor.submit(run_in_app_context, app, loader, *args)
+
+    future = Future()
+    try:
+        future.set_result(loader(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -0,0 +1,112 @@
+"""Keyset (seek) and single-query offset pagination helpers."""
+import math
+from datetime import datetime
+from sqlalchemy import and_, or_, func
+from utils.validators import ValidationError
+
+def parse_cursor(cursor):
+    """Parse a ``<iso created_at>,<id>`` cursor.
+
+    Args:
+        cursor (str): Cursor from a previous page's ``next_cursor``
+
+    Returns:
+        tuple: (created_at, id), or None for the first page
+
+    Raises:
+        ValidationError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        created_at, row_id = cursor.rsplit(',', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise ValidationError('Invalid cursor')
+
+def keyset_paginate(query, created_col, id_col, cursor, per_page):
+    """Fetch one page ordered newest first, seeking past the cursor.
+
+    Unlike OFFSET pagination the database does not walk skipped rows, and
+    no COUNT(*) is issued.
+
+    Args:
+        query: Filtered query whose rows expose ``created_at`` and ``id``
+        created_col: Timestamp column to order by
+        id_col: Primary key column used as tie-breaker
+        cursor (str): Cursor from the previous page, or None/empty for the first page
+        per_page (int): Rows per page
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        ValidationError: If the cursor is malformed or per_page is below 1
+    """
+    if per_page < 1:
+        raise ValidationError('per_page must be at least 1')
+    position = parse_cursor(cursor)
+    if position is not None:
+        created_at, row_id = position
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id)
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = f"{last.created_at.isoformat()},{last.id}"
+    return rows, next_cursor
+
+class OffsetPage:
+    """One page of an offset-paginated query, shaped like Flask-SQLAlchemy's Pagination."""
+
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.pages = math.ceil(total / per_page) if per_page else 0
+        self.has_prev = page > 1
+        self.has_next = page < self.pages
+
+def offset_paginate(query, page, per_page):
+    """Fetch one LIMIT/OFFSET page and the total row count in a single query.
+
+    ``Query.paginate()`` runs the filtered query twice, once for the page and
+    once as ``SELECT COUNT(*)``. Here the total rides along on every row as
+    ``COUNT(*) OVER ()``. Only a page past the end needs a separate count.
+
+    Args:
+        query: Ordered query, e.g. ``Transaction.projection_query()``. For a
+            single-entity query (``User.query``) the items are the entities;
+            otherwise they are rows with a trailing ``total_count`` column.
+        page (int): 1-based page number; values below 1 are treated as 1
+        per_page (int): Rows per page; values below 1 are treated as 1, so
+            a negative LIMIT/OFFSET never reaches the database
+
+    Returns:
+        OffsetPage: Rows plus page metadata, with the clamped page and per_page
+    """
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    columns = query.column_descriptions
+    single_entity = len(columns) == 1 and columns[0]['expr'] is columns[0]['entity']
+
+    rows = query.add_columns(func.count().over().label('total_count')).limit(
+        per_page
+    ).offset((page - 1) * per_page).all()
+
+    if rows:
+        total = rows[0].total_count
+    elif page > 1:
+        total = query.order_by(None).count()
+    else:
+        total = 0
+    if single_entity:
+        rows = [row[0] for row in rows]
+    return OffsetPage(rows, page, per_page, total)
@@ -0,0 +1,31 @@
+"""Optional Redis connection shared across workers."""
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # Redis is optional; callers fall back to local state
+    redis = None
+
+_client = None
+_client_url = None
+
+def get_redis():
+    """Get the shared Redis client.
+    
+    Returns:
+        redis.Redis: Client for ``REDIS_URL``, or None when Redis is not
+        installed or not configured
+    """
+    global _client, _client_url
+    
+    if redis is None:
+        return None
+    
+    url = current_app.config.get('REDIS_URL')
+    if not url:
+        return None
+    
+    if _client is None or _client_url != url:
+        _client = redis.Redis.from_url(url, socket_timeout=1)
+        _client_url = url
+    return _client
@@ -1,6 +1,58 @@
 """Standardized API response utilities."""
-from flask import jsonify
+from flask import jsonify, current_app, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
+import uuid
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; Flask's stdlib encoder is used instead
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+    
+    Output matches the default provider (sorted keys, HTTP-date datetimes,
+    Decimal/UUID as strings) except that non-ASCII text is emitted as UTF-8
+    rather than escaped.
+    """
+    
+    def _options(self, indent=False, sort_keys=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+    
+    def dumps(self, obj, **kwargs):
+        option = self._options(kwargs.get('indent'), kwargs.get('sort_keys'))
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def dumpb(self, obj):
+        """Serialize ``obj`` straight to UTF-8 bytes, skipping the str round-trip."""
+        return orjson.dumps(obj, default=self.default, option=self._options())
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+def init_json(app):
+    """Use orjson for all jsonify() responses when it is installed."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+def _item_encoder():
+    """Encoder for streamed list items, returning bytes ready for the socket."""
+    provider = current_app.json
+    if isinstance(provider, OrjsonProvider):
+        return provider.dumpb
+    return lambda obj: provider.dumps(obj).encode()
 
 class APIResponse:
     """Utility class for creating standardized API responses."""
@@ -183,6 +235,86 @@ def success_response(data=None, message="Success", status_code=200):
     
     return jsonify(response), status_code
 
+def conditional_success_response(data=None, message="Success", max_age=10):
+    """
+    Create a success response that supports ``If-None-Match`` revalidation.
+    
+    An ETag is derived from the encoded body; when the client already holds
+    that version the response becomes a bodiless 304.
+    
+    Args:
+        data: The response data
+        message: Success message
+        max_age: Seconds the client may reuse the response without asking
+        
+    Returns:
+        Flask JSON response (200, or 304 when unchanged)
+    """
+    response, _ = success_response(data, message)
+    response.add_etag()
+    response.headers['Cache-Control'] = f'private, max-age={max_age}'
+    return response.make_conditional(request)
+
+def stream_success_response(items, list_key=None, data=None, message="Success", status_code=200, flat=False):
+    """
+    Create a standardized success response whose list is encoded item by item.
+    
+    The body has the same layout as ``success_response()``: the list is
+    ``data`` itself, or ``data[list_key]`` next to the other ``data`` fields.
+    With ``flat`` it has the ``APIResponse.success()`` layout instead: the
+    fields and ``list_key`` sit at the top level next to a timestamp.
+    
+    Items are dicts built and serialized as the iterable yields them, after
+    the 200 status has been sent. Pass rows that are already loaded (a list
+    or a ``map()`` over one): the database session may be gone by the time
+    the body is generated, so no query or lazy load may run inside ``items``.
+    If encoding an item still fails, the error is logged and re-raised so
+    the server aborts the response instead of finishing it as if complete.
+    
+    Args:
+        items: Iterable of JSON-serializable items
+        list_key: Key for the list inside ``data`` (or at the top level with
+            ``flat``), or None to make it ``data``
+        data: Other ``data`` fields (only with ``list_key``)
+        message: Success message
+        status_code: HTTP status code
+        flat: Use the ``APIResponse.success()`` layout (requires ``list_key``)
+        
+    Returns:
+        Flask streamed JSON response
+    """
+    dumps = current_app.json.dumps
+    placeholder = uuid.uuid4().hex
+    
+    if flat:
+        body = {
+            "status": "success",
+            "message": message,
+            "timestamp": datetime.now().isoformat(),
+            **(data or {}),
+            list_key: placeholder
+        }
+    else:
+        payload = placeholder if list_key is None else {**(data or {}), list_key: placeholder}
+        body = {"status": "success", "message": message, "data": payload}
+    head, tail = dumps(body).split(dumps(placeholder), 1)
+    head, tail = (head + '[').encode(), (']' + tail + '\n').encode()
+    encode = _item_encoder()
+    
+    def generate():
+        yield head
+        try:
+            for index, item in enumerate(items):
+                yield b',' + encode(item) if index else encode(item)
+        except Exception as e:
+            print(f"Streamed response failed mid-body: {e}")
+            raise
+        yield tail
+    
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype='application/json'
+    ), status_code
+
 def error_response(message="An error occurred", status_code=400, error_code=None):
     """
     Create a standardized error response.
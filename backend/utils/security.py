@@ -1,10 +1,21 @@
 """Security utilities and decorators."""
 from functools import wraps
-from flask import request, jsonify, session, abort, redirect, url_for
+from flask import request, jsonify, session, abort, redirect, url_for, make_response
 from flask_login import current_user
 from services.auth_service import AuthService
+from utils.redis_client import get_redis
 import time
 import hashlib
+import threading
+import uuid
+
+def _is_api_request():
+    """Check whether the current request expects a JSON response."""
+    if request.is_json or request.path.startswith('/admin/api/'):
+        return True
+    headers = request.headers
+    return (headers.get('Content-Type', '').startswith('application/json') or
+            headers.get('X-Requested-With') == 'XMLHttpRequest')
 
 def login_required(f):
     """Require user to be logged in."""
@@ -12,10 +23,7 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated:
             # Check if this is an API request
-            if (request.is_json or 
-                request.path.startswith('/admin/api/') or 
-                request.headers.get('Content-Type', '').startswith('application/json') or
-                request.headers.get('X-Requested-With') == 'XMLHttpRequest'):
+            if _is_api_request():
                 return jsonify({'error': 'Authentication required'}), 401
             else:
                 # Redirect to login page for web requests
@@ -29,10 +37,7 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated:
             # Check if this is an API request
-            if (request.is_json or 
-                request.path.startswith('/admin/api/') or 
-                request.headers.get('Content-Type', '').startswith('application/json') or
-                request.headers.get('X-Requested-With') == 'XMLHttpRequest'):
+            if _is_api_request():
                 return jsonify({'error': 'Authentication required'}), 401
             else:
                 # Redirect to login page for web requests
@@ -40,10 +45,7 @@ def admin_required(f):
         
         if current_user.role != 'admin':
             # Check if this is an API request
-            if (request.is_json or 
-                request.path.startswith('/admin/api/') or 
-                request.headers.get('Content-Type', '').startswith('application/json') or
-                request.headers.get('X-Requested-With') == 'XMLHttpRequest'):
+            if _is_api_request():
                 return jsonify({'error': 'Admin access required'}), 403
             else:
                 # Redirect to login page for web requests (or could be a 403 page)
@@ -61,10 +63,7 @@ def csrf_required(f):
             print(f"CSRF Token: {token}")  # Debugging line to check CSRF token
             if not AuthService.validate_csrf_token(token):
                 # Check if this is an API request
-                if (request.is_json or 
-                    request.path.startswith('/admin/api/') or 
-                    request.headers.get('Content-Type', '').startswith('application/json') or
-                    request.headers.get('X-Requested-With') == 'XMLHttpRequest'):
+                if _is_api_request():
                     return jsonify({'error': 'Invalid CSRF token'}), 403
                 else:
                     # For web requests, redirect to login with error message
@@ -72,47 +71,192 @@ def csrf_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# INCR + EXPIRE in one atomic round-trip: the first hit in a window starts the TTL
+RATE_LIMIT_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return current
+"""
+
+_rate_limit_script = None
+
+def _redis_rate_count(client, key, window):
+    """Count a hit against the shared Redis window stored at ``key``.
+    
+    Returns:
+        int: Requests seen in the current window, or None if Redis is unavailable
+    """
+    global _rate_limit_script
+    if client is None:
+        return None
+    try:
+        if _rate_limit_script is None:
+            _rate_limit_script = client.register_script(RATE_LIMIT_SCRIPT)
+        return int(_rate_limit_script(keys=[key], args=[window], client=client))
+    except Exception as e:
+        print(f"Redis rate limit unavailable, using session fallback: {e}")
+        return None
+
+def _session_rate_limited(client_ip, endpoint, max_requests, window):
+    """Per-session sliding window used when Redis is not configured."""
+    key = hashlib.md5(f"{client_ip}:{endpoint}".encode()).hexdigest()
+    
+    current_time = int(time.time())
+    window_start = current_time - window
+    
+    if 'rate_limits' not in session:
+        session['rate_limits'] = {}
+    
+    # Clean old entries
+    recent = [
+        req_time for req_time in session['rate_limits'].get(key, [])
+        if req_time > window_start
+    ]
+    
+    if len(recent) >= max_requests:
+        session['rate_limits'][key] = recent
+        return True
+    
+    # Add current request
+    recent.append(current_time)
+    session['rate_limits'][key] = recent
+    return False
+
 def rate_limit(max_requests=60, window=60):
-    """Rate limiting decorator."""
+    """Rate limiting decorator.
+    
+    Uses a Redis counter shared by all workers when ``REDIS_URL`` is set,
+    otherwise falls back to tracking requests in the client session.
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Create unique key for this client and endpoint
             client_ip = AuthService.get_client_ip()
             endpoint = request.endpoint
-            key = hashlib.md5(f"{client_ip}:{endpoint}".encode()).hexdigest()
-            
-            # Check rate limit (you might want to use Redis for production)
-            current_time = int(time.time())
-            window_start = current_time - window
-            
-            # For now, we'll store in session (in production, use Redis)
-            if 'rate_limits' not in session:
-                session['rate_limits'] = {}
             
-            if key not in session['rate_limits']:
-                session['rate_limits'][key] = []
-            
-            # Clean old entries
-            session['rate_limits'][key] = [
-                req_time for req_time in session['rate_limits'][key] 
-                if req_time > window_start
-            ]
+            count = _redis_rate_count(get_redis(), f"rl:{client_ip}:{endpoint}", window)
+            if count is None:
+                limited = _session_rate_limited(client_ip, endpoint, max_requests, window)
+            else:
+                limited = count > max_requests
             
-            # Check if limit exceeded
-            if len(session['rate_limits'][key]) >= max_requests:
+            if limited:
                 if request.is_json:
                     return jsonify({'error': 'Rate limit exceeded'}), 429
                 else:
                     abort(429)
             
-            # Add current request
-            session['rate_limits'][key].append(current_time)
-            
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def throttle_exceeded(key, max_requests, window):
+    """Fixed-window throttle on an arbitrary key (e.g. a username).
+    
+    Args:
+        key (str): Redis key identifying what is being throttled
+        max_requests (int): Hits allowed per window
+        window (int): Window length in seconds
+        
+    Returns:
+        bool: True once the window is exhausted; always False without Redis
+    """
+    count = _redis_rate_count(get_redis(), key, window)
+    return count is not None and count > max_requests
+
+# Claim a slot in a sorted set of in-flight request ids (scored by start
+# time) unless the limit is reached; entries older than the hold timeout are
+# treated as leaked and pruned first
+CONCURRENCY_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_concurrency_script = None
+
+# Per-process in-flight counts used when Redis is not configured
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def _acquire_slot(key, request_id, max_concurrent, hold_timeout):
+    """Claim an in-flight slot for ``key``.
+    
+    Returns:
+        tuple: (acquired, release) where ``release`` frees the slot
+    """
+    global _concurrency_script
+    client = get_redis()
+    if client is not None:
+        try:
+            if _concurrency_script is None:
+                _concurrency_script = client.register_script(CONCURRENCY_SCRIPT)
+            acquired = _concurrency_script(
+                keys=[key], args=[time.time(), hold_timeout, max_concurrent, request_id],
+                client=client
+            )
+        except Exception as e:
+            print(f"Redis concurrency limit unavailable, using local count: {e}")
+        else:
+            def release():
+                try:
+                    client.zrem(key, request_id)
+                except Exception as e:
+                    print(f"Failed to release concurrency slot {key}: {e}")
+            return bool(acquired), release
+    
+    with _in_flight_lock:
+        if _in_flight.get(key, 0) >= max_concurrent:
+            return False, None
+        _in_flight[key] = _in_flight.get(key, 0) + 1
+    
+    def release():
+        with _in_flight_lock:
+            _in_flight[key] -= 1
+    return True, release
+
+def concurrency_limit(max_concurrent=3, hold_timeout=30):
+    """Limit how many requests per user may run an endpoint at once.
+    
+    Unlike ``rate_limit`` this bounds in-flight work, so a burst of heavy
+    dashboard requests cannot tie up the connection pool. Slots are shared
+    through Redis when ``REDIS_URL`` is set, otherwise counted per process.
+    A streamed response keeps its slot until the body has been sent.
+    
+    Args:
+        max_concurrent (int): Requests allowed in flight per user and endpoint
+        hold_timeout (int): Seconds after which an unreleased slot is reclaimed
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_key = current_user.get_id() if current_user.is_authenticated else AuthService.get_client_ip()
+            key = f"cl:{user_key}:{request.endpoint}"
+            
+            acquired, release = _acquire_slot(key, uuid.uuid4().hex, max_concurrent, hold_timeout)
+            if not acquired:
+                return jsonify({'error': 'Too many concurrent requests'}), 429
+            
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                release()
+                raise
+            
+            if response.is_streamed:
+                response.call_on_close(release)
+            else:
+                release()
+            return response
+        return decorated_function
+    return decorator
+
 def api_login_required(f):
     """Require user to be logged in for API endpoints (always returns JSON)."""
     @wraps(f)
@@ -11,6 +11,12 @@ class PaymentValidator:
     
     SUPPORTED_METHODS = ['ecocash', 'innbucks', 'omari']
     PHONE_PATTERN = re.compile(r'^(\+263|0)[0-9]{9}$')
+    OTP_PATTERN = re.compile(r'^\d{6}$')
+    # LOAN_/TEST_ references from PaymentService, or the
+    # {random}sl00a.{timestamp}.{loan_id} ones from Transaction.generate_reference()
+    REFERENCE_PATTERN = re.compile(
+        r'^(?:(?:LOAN|TEST)_[A-Z0-9]{8}|[a-z]{3}sl00a\.\d{14}\.[A-Za-z0-9_-]{1,20})$'
+    )
     
     @classmethod
     def validate_payment_request(cls, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -97,7 +103,7 @@ class PaymentValidator:
         
         # Validate OTP
         otp = str(data['otp']).strip()
-        if not re.match(r'^\d{6}$', otp):
+        if not cls.OTP_PATTERN.match(otp):
             errors.append("OTP must be a 6-digit number")
         
         if errors:
@@ -126,8 +132,8 @@ class PaymentValidator:
         
         reference = reference.strip()
         
-        # Check reference format (should be LOAN_XXXXXXXX or TEST_XXXXXXXX)
-        if not re.match(r'^(LOAN|TEST)_[A-Z0-9]{8}$', reference):
+        # Check reference format (LOAN_XXXXXXXX, TEST_XXXXXXXX or a generated one)
+        if not cls.REFERENCE_PATTERN.match(reference):
             raise ValidationError("Invalid reference format")
         
         return reference